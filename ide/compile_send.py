@@ -1,13 +1,35 @@
 from __future__ import annotations
 
 import json
+import os
+import queue
 import re
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 from ide.runtime_client import RuntimeClient, RuntimeProfile
 
+try:
+    import orjson
+except ImportError:  # fallback: stdlib json
+    orjson = None
+
+# letture sorgenti in parallelo (I/O bound: i thread rilasciano il GIL)
+_READ_MAX_WORKERS = 32
+
+# file:line:col: msg | file:line: msg | file(line): msg — provati in quest'ordine
+_RE_DIAG_ANY = re.compile(
+    r"^(?:(?P<f1>[^:]+):(?P<l1>\d+):(?P<c1>\d+)|(?P<f2>[^:]+):(?P<l2>\d+)|(?P<f3>.+)\((?P<l3>\d+)\)):\s*(?P<msg>.*)$"
+)
+_RE_IF_OR_ENDIF = re.compile(r"\b(END_IF|IF)\b", re.IGNORECASE)
+_RE_NEWLINE = re.compile(r"\n")
+# (* ... *) (anche non chiuso fino a EOF) oppure // fino a fine riga
+_RE_ST_COMMENT = re.compile(r"\(\*.*?(?:\*\)|\Z)|//[^\r\n]*", re.DOTALL)
+
 
 # -----------------------
 # Helpers
@@ -17,35 +39,46 @@ def _utc_now_iso() -> str:
 
 
 def _load_json(p: Path) -> Dict[str, Any]:
-    return json.loads(p.read_text(encoding="utf-8"))
+    if orjson is not None:
+        return orjson.loads(p.read_bytes())
+    return json.loads(p.read_bytes())
+
+
+def _decode_source(raw: bytes) -> str:
+    """Decode UTF-8 con newline universali (come Path.read_text)."""
+    txt = raw.decode("utf-8")
+    if "\r" in txt:
+        txt = txt.replace("\r\n", "\n").replace("\r", "\n")
+    return txt
 
 
 def _collect_paths_from_pages_json(pages: Dict[str, Any]) -> Tuple[set[str], list[str]]:
     """Return (relative_paths_set, warnings)."""
     rels: set[str] = set()
+    rels_add = rels.add
     warnings: list[str] = []
 
-    def add_file(rel: Any) -> None:
-        if isinstance(rel, str) and rel.strip():
-            rels.add(rel.replace("\\", "/"))
-
     init = pages.get("init")
     if isinstance(init, dict):
         for sh in init.get("sheets", []) or []:
             if isinstance(sh, dict):
-                add_file(sh.get("file"))
+                rel = sh.get("file")
+                if isinstance(rel, str) and rel.strip():
+                    rels_add(rel.replace("\\", "/"))
 
     for p in pages.get("pages", []) or []:
         if not isinstance(p, dict):
             continue
         pid = str(p.get("id", ""))
         if pid:
-            add_file(f"pages/{pid}.st")  # wrapper
+            rels_add(f"pages/{pid}.st")  # wrapper
         for sh in p.get("sheets", []) or []:
             if isinstance(sh, dict):
-                add_file(sh.get("file"))
+                rel = sh.get("file")
+                if isinstance(rel, str) and rel.strip():
+                    rels_add(rel.replace("\\", "/"))
 
-    add_file("pages/INIT.st")  # wrapper init
+    rels_add("pages/INIT.st")  # wrapper init
 
     if not rels:
         warnings.append("Nessun file trovato in pages.json")
@@ -63,19 +96,29 @@ def build_project_bundle(project_root: Path) -> Dict[str, Any]:
 
     rel_paths, warnings = _collect_paths_from_pages_json(pages_json)
 
-    sources: Dict[str, str] = {}
+    raws: Dict[str, bytes] = {}
     missing: list[str] = []
-    total_bytes = 0
 
-    for rel in sorted(rel_paths):
-        fp = (project_root / rel).resolve()
+    rels = sorted(rel_paths)
+    with ThreadPoolExecutor(max_workers=max(1, min(_READ_MAX_WORKERS, len(rels)))) as ex:
+        futures = [(rel, ex.submit((project_root / rel).read_bytes)) for rel in rels]
+
+        for rel, fut in futures:
+            try:
+                raws[rel] = fut.result()
+            except FileNotFoundError:
+                missing.append(rel)
+            except Exception as e:
+                raise RuntimeError(f"Errore lettura {rel}: {e}")
+
+    # \r\n -> \n toglie 1 byte per coppia (come il vecchio read_text + encode)
+    total_bytes = sum(map(len, raws.values())) - sum(r.count(b"\r\n") for r in raws.values())
+
+    sources: Dict[str, str] = {}
+    for rel, raw in raws.items():
         try:
-            txt = fp.read_text(encoding="utf-8")
-            sources[rel] = txt
-            total_bytes += len(txt.encode("utf-8"))
-        except FileNotFoundError:
-            missing.append(rel)
-        except Exception as e:
+            sources[rel] = _decode_source(raw)
+        except UnicodeDecodeError as e:
             raise RuntimeError(f"Errore lettura {rel}: {e}")
 
     if missing:
@@ -100,26 +143,45 @@ def build_project_bundle(project_root: Path) -> Dict[str, Any]:
 # Diagnostics normalize
 # -----------------------
 def _as_rel_posix(project_root: Path, p: str) -> str:
+    """project_root deve essere già resolve()d (lo fa extract_diagnostics una volta sola)."""
     try:
         pp = Path(p)
         if not pp.is_absolute():
             return pp.as_posix().replace("\\", "/")
-        pr = project_root.resolve()
-        rel = pp.resolve().relative_to(pr)
+        try:
+            rel = Path(os.path.normpath(pp)).relative_to(project_root)
+        except ValueError:
+            # fuori root "testuale": forse symlink/junction, allora risolvo davvero
+            rel = pp.resolve().relative_to(project_root)
         return rel.as_posix().replace("\\", "/")
     except Exception:
         return str(p).replace("\\", "/")
 
 
+def _as_rel_posix_fast(pr: Path, pr_str: str, p: str) -> str:
+    """Come _as_rel_posix, ma se p inizia con la root (stringa) evita Path/normpath."""
+    if p.startswith(pr_str):
+        rest = p[len(pr_str):]
+        if rest[:1] in ("/", "\\") and "/." not in rest and "\\." not in rest:
+            return rest.lstrip("/\\").replace("\\", "/")
+    return _as_rel_posix(pr, p)
+
+
+_SEV_MAP = {
+    "WARNING": "WARN",
+    "WARN": "WARN",
+    "W": "WARN",
+    "ERROR": "ERROR",
+    "ERR": "ERROR",
+    "E": "ERROR",
+    "INFO": "INFO",
+    "I": "INFO",
+}
+
+
 def _norm_sev(s: Any) -> str:
     t = str(s or "").strip().upper()
-    if t in ("WARNING", "WARN", "W"):
-        return "WARN"
-    if t in ("ERROR", "ERR", "E"):
-        return "ERROR"
-    if t in ("INFO", "I"):
-        return "INFO"
-    return t or "INFO"
+    return _SEV_MAP.get(t, t or "INFO")
 
 
 def _parse_diag_line(line: str) -> Dict[str, Any] | None:
@@ -127,24 +189,29 @@ def _parse_diag_line(line: str) -> Dict[str, Any] | None:
     if not s:
         return None
 
-    m = re.match(r"^(?P<file>[^:]+):(?P<line>\d+):(?P<col>\d+):\s*(?P<msg>.*)$", s)
-    if m:
-        return {"sev": "ERROR", "file": m.group("file"), "line": int(m.group("line")), "col": int(m.group("col")), "msg": m.group("msg")}
-
-    m = re.match(r"^(?P<file>[^:]+):(?P<line>\d+):\s*(?P<msg>.*)$", s)
-    if m:
-        return {"sev": "ERROR", "file": m.group("file"), "line": int(m.group("line")), "col": 0, "msg": m.group("msg")}
-
-    m = re.match(r"^(?P<file>.+)\((?P<line>\d+)\):\s*(?P<msg>.*)$", s)
-    if m:
-        return {"sev": "ERROR", "file": m.group("file"), "line": int(m.group("line")), "col": 0, "msg": m.group("msg")}
+    m = _RE_DIAG_ANY.match(s)
+    if not m:
+        return None
 
-    return None
+    f1, f2 = m.group("f1"), m.group("f2")
+    if f1 is not None:
+        return {"sev": "ERROR", "file": f1, "line": int(m.group("l1")), "col": int(m.group("c1")), "msg": m.group("msg")}
+    if f2 is not None:
+        return {"sev": "ERROR", "file": f2, "line": int(m.group("l2")), "col": 0, "msg": m.group("msg")}
+    return {"sev": "ERROR", "file": m.group("f3"), "line": int(m.group("l3")), "col": 0, "msg": m.group("msg")}
 
 
 def extract_diagnostics(project_root: Path, resp: Dict[str, Any]) -> List[Dict[str, Any]]:
     diags: List[Dict[str, Any]] = []
     payload = (resp.get("payload") or {}) if isinstance(resp, dict) else {}
+    pr = project_root.resolve()
+    pr_str = str(pr)
+
+    # binding locali: il loop sotto può girare su migliaia di diagnostiche
+    as_rel = _as_rel_posix_fast
+    norm_sev = _norm_sev
+    parse_line = _parse_diag_line
+    add = diags.append
 
     raw = payload.get("diagnostics") or payload.get("diags")
     if raw is None:
@@ -153,48 +220,43 @@ def extract_diagnostics(project_root: Path, resp: Dict[str, Any]) -> List[Dict[s
         if isinstance(errs, list) or isinstance(warns, list):
             raw = []
             if isinstance(errs, list):
-                for x in errs:
-                    raw.append({"severity": "ERROR", **(x if isinstance(x, dict) else {"message": str(x)})})
+                raw += [{"severity": "ERROR", **(x if isinstance(x, dict) else {"message": str(x)})} for x in errs]
             if isinstance(warns, list):
-                for x in warns:
-                    raw.append({"severity": "WARN", **(x if isinstance(x, dict) else {"message": str(x)})})
+                raw += [{"severity": "WARN", **(x if isinstance(x, dict) else {"message": str(x)})} for x in warns]
 
     if isinstance(raw, list):
         for item in raw:
             if isinstance(item, str):
-                d = _parse_diag_line(item)
+                d = parse_line(item)
                 if d:
-                    d["file"] = _as_rel_posix(project_root, d.get("file", ""))
-                    diags.append(d)
+                    d["file"] = as_rel(pr, pr_str, d.get("file", ""))
+                    add(d)
                 else:
-                    diags.append({"sev": "ERROR", "file": "", "line": 0, "col": 0, "msg": item})
+                    add({"sev": "ERROR", "file": "", "line": 0, "col": 0, "msg": item})
                 continue
 
             if isinstance(item, dict):
-                sev = _norm_sev(item.get("sev") or item.get("severity") or item.get("level"))
-                fp = item.get("file") or item.get("path") or ""
-                msg = item.get("msg") or item.get("message") or ""
-                line = int(item.get("line") or 0)
-                col = int(item.get("col") or item.get("column") or 0)
-                diags.append(
+                g = item.get
+                fp = g("file") or g("path") or ""
+                add(
                     {
-                        "sev": sev,
-                        "file": _as_rel_posix(project_root, str(fp)) if fp else "",
-                        "line": line,
-                        "col": col,
-                        "msg": str(msg),
+                        "sev": norm_sev(g("sev") or g("severity") or g("level")),
+                        "file": as_rel(pr, pr_str, str(fp)) if fp else "",
+                        "line": int(g("line") or 0),
+                        "col": int(g("col") or g("column") or 0),
+                        "msg": str(g("msg") or g("message") or ""),
                     }
                 )
 
     if not diags:
         err = resp.get("error") if isinstance(resp, dict) else None
         if isinstance(err, str) and err.strip():
-            d = _parse_diag_line(err)
+            d = parse_line(err)
             if d:
-                d["file"] = _as_rel_posix(project_root, d.get("file", ""))
-                diags.append(d)
+                d["file"] = as_rel(pr, pr_str, d.get("file", ""))
+                add(d)
             else:
-                diags.append({"sev": "ERROR", "file": "", "line": 0, "col": 0, "msg": err})
+                add({"sev": "ERROR", "file": "", "line": 0, "col": 0, "msg": err})
 
     return diags
 
@@ -203,34 +265,8 @@ def extract_diagnostics(project_root: Path, resp: Dict[str, Any]) -> List[Dict[s
 # ST sanity-check (MVP)
 # -----------------------
 def _strip_st_comments(text: str) -> str:
-    out: list[str] = []
-    i = 0
-    n = len(text)
-    in_block = False
-
-    while i < n:
-        if in_block:
-            if text.startswith("*)", i):
-                in_block = False
-                i += 2
-            else:
-                i += 1
-            continue
-
-        if text.startswith("(*", i):
-            in_block = True
-            i += 2
-            continue
-
-        if text.startswith("//", i):
-            while i < n and text[i] not in "\r\n":
-                i += 1
-            continue
-
-        out.append(text[i])
-        i += 1
-
-    return "".join(out)
+    # i commenti a blocco mantengono i '\n' interni: numeri di riga stabili per l'IF check
+    return _RE_ST_COMMENT.sub(lambda m: "\n" * m.group(0).count("\n"), text)
 
 
 def _st_if_balance_check(sources: Dict[str, str]) -> List[Dict[str, Any]]:
@@ -242,16 +278,19 @@ def _st_if_balance_check(sources: Dict[str, str]) -> List[Dict[str, Any]]:
         clean = _strip_st_comments(txt)
         stack: list[int] = []
 
-        for ln, line in enumerate(clean.splitlines(), start=1):
-            if re.search(r"\bEND_IF\b", line, flags=re.IGNORECASE):
+        # offset dei '\n' per ricavare il numero di riga di ogni match
+        nl = [m.start() for m in _RE_NEWLINE.finditer(clean)]
+
+        for m in _RE_IF_OR_ENDIF.finditer(clean):
+            ln = bisect_right(nl, m.start()) + 1
+            if m.group(1).upper() == "END_IF":
                 if stack:
                     stack.pop()
                 else:
                     diags.append({"sev": "ERROR", "file": rel, "line": ln, "col": 0, "msg": "END_IF senza IF corrispondente"})
                 continue
 
-            if re.search(r"\bIF\b", line, flags=re.IGNORECASE):
-                stack.append(ln)
+            stack.append(ln)
 
         for start_ln in stack:
             diags.append({"sev": "ERROR", "file": rel, "line": start_ln, "col": 0, "msg": "IF senza END_IF"})
@@ -262,10 +301,52 @@ def _st_if_balance_check(sources: Dict[str, str]) -> List[Dict[str, Any]]:
 # -----------------------
 # Jobs (async-safe)
 # -----------------------
+# Pool di RuntimeClient per (host, port): il client non è thread-safe (_req_id),
+# quindi ogni job ne prende uno in esclusiva e lo restituisce a fine uso.
+_CLIENT_POOL: Dict[Tuple[str, int], "queue.Queue[RuntimeClient]"] = {}
+_CLIENT_POOL_LOCK = threading.Lock()
+
+
+def _client_pool(host: str, port: int) -> "queue.Queue[RuntimeClient]":
+    key = (host, int(port))
+    with _CLIENT_POOL_LOCK:
+        q = _CLIENT_POOL.get(key)
+        if q is None:
+            q = _CLIENT_POOL[key] = queue.Queue()
+        return q
+
+
 def _mk_client(host: str, port: int) -> RuntimeClient:
-    c = RuntimeClient()
-    c.set_profile(RuntimeProfile("job", host, int(port)))
-    return c
+    try:
+        return _client_pool(host, port).get_nowait()
+    except queue.Empty:
+        c = RuntimeClient()
+        c.set_profile(RuntimeProfile("job", host, int(port)))
+        return c
+
+
+def _release_client(c: RuntimeClient) -> None:
+    with _CLIENT_POOL_LOCK:
+        q = _CLIENT_POOL.get((c.profile.host, int(c.profile.port)))
+    if q is None:
+        # pool svuotato (disconnessione/cambio profilo) mentre il job era in corso
+        c.close()
+        return
+    q.put(c)
+
+
+def _clear_client_cache() -> None:
+    """Chiude i client parcheggiati nel pool (disconnessione, cambio profilo, uscita)."""
+    with _CLIENT_POOL_LOCK:
+        pools = list(_CLIENT_POOL.values())
+        _CLIENT_POOL.clear()
+    # i client tengono un socket persistente: chiudo quelli parcheggiati
+    for q in pools:
+        while True:
+            try:
+                q.get_nowait().close()
+            except queue.Empty:
+                break
 
 
 def compile_job(project_root: Path, host: str, port: int) -> Dict[str, Any]:
@@ -290,7 +371,10 @@ def compile_job(project_root: Path, host: str, port: int) -> Dict[str, Any]:
             }
 
         client = _mk_client(host, int(port))
-        resp = client.load_project(bundle)
+        try:
+            resp = client.load_project(bundle)
+        finally:
+            _release_client(client)
 
         ok = bool(resp.get("ok", False))
         info = (resp.get("payload") or {}).get("project_info") or {}
@@ -326,6 +410,8 @@ def compile_project(window: Any) -> None:
         window.log("COMPILA: ERRORE — nessun progetto aperto")
         return
 
+    set_diags = getattr(window, "diag_set", None)
+
     prof = getattr(getattr(window, "client", None), "profile", None)
     host = getattr(prof, "host", "127.0.0.1")
     port = int(getattr(prof, "port", 1963))
@@ -342,8 +428,8 @@ def compile_project(window: Any) -> None:
         window.log(f"COMPILA: FAIL — {res.get('error','?')}")
 
     diags = res.get("diagnostics") or []
-    if diags and hasattr(window, "diag_set"):
-        window.diag_set(diags)
+    if set_diags and diags:
+        set_diags(diags)
 
 
 def send_project(window: Any) -> None:
@@ -351,6 +437,8 @@ def send_project(window: Any) -> None:
         window.log("SEND: ERRORE — nessun progetto aperto")
         return
 
+    set_diags = getattr(window, "diag_set", None)
+
     prof = getattr(getattr(window, "client", None), "profile", None)
     host = getattr(prof, "host", "127.0.0.1")
     port = int(getattr(prof, "port", 1963))
@@ -367,5 +455,5 @@ def send_project(window: Any) -> None:
         window.log(f"SEND: FAIL — {res.get('error','?')}")
 
     diags = res.get("diagnostics") or []
-    if diags and hasattr(window, "diag_set"):
-        window.diag_set(diags)
+    if set_diags and diags:
+        set_diags(diags)
@@ -1,18 +1,20 @@
 # parte 2/9 — ide/config.py
 from __future__ import annotations
 
-from PySide6 import QtCore
-
 APP_NAME = "KnetX IDE-lite"
 SCHEMA_VERSION_PROJECT = 1
 
+# Qt.UserRole (0x0100, ABI stabile): niente import PySide6 qui, così
+# utils/project_model restano importabili nei path headless (job/CLI).
+_USER_ROLE = 0x0100
+
 # Tree item roles
-ROLE_TITLE = int(QtCore.Qt.UserRole + 1)
-ROLE_FILE = int(QtCore.Qt.UserRole)
-ROLE_PAGE_ID = int(QtCore.Qt.UserRole + 2)
-ROLE_PAGE_NAME = int(QtCore.Qt.UserRole + 3)
-ROLE_SHEET_INDEX0 = int(QtCore.Qt.UserRole + 4)
-ROLE_NODE_KIND = int(QtCore.Qt.UserRole + 10)  # 'PAGES_ROOT' | 'PAGE' | 'SHEET'
+ROLE_TITLE = _USER_ROLE + 1
+ROLE_FILE = _USER_ROLE
+ROLE_PAGE_ID = _USER_ROLE + 2
+ROLE_PAGE_NAME = _USER_ROLE + 3
+ROLE_SHEET_INDEX0 = _USER_ROLE + 4
+ROLE_NODE_KIND = _USER_ROLE + 10  # 'PAGES_ROOT' | 'PAGE' | 'SHEET'
 
 # Editor defaults
 CODE_FONT_FAMILY = "Verdana"
@@ -6,17 +6,32 @@
 from __future__ import annotations
 
 import json
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:  # fallback: stdlib json
+    orjson = None
+
+# maschere orjson per save(): compatta / pretty, calcolate una volta
+if orjson is not None:
+    _ORJSON_OPT_COMPACT = orjson.OPT_APPEND_NEWLINE
+    _ORJSON_OPT_PRETTY = orjson.OPT_APPEND_NEWLINE | orjson.OPT_INDENT_2
+
 DEFAULT_PORT = 1963
 CONNECTIONS_FILENAME = "connections.json"
 SCHEMA_VERSION_CONNECTIONS = 1
 
+# O_BINARY: su Windows niente traduzione \n -> \r\n
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
 
-@dataclass
+
+@dataclass(slots=True)
 class ConnProfile:
+    # slots ma non frozen: SettingsWidget aggiorna host/port/name in place
     name: str
     host: str
     port: int
@@ -43,38 +58,83 @@ class ConnectionStore:
 
     def __init__(self, project_dir: Path) -> None:
         self.project_dir = project_dir.resolve()
-        self.path = (self.project_dir / CONNECTIONS_FILENAME).resolve()
+        # project_dir è già canonico: niente secondo resolve()
+        self.path = self.project_dir / CONNECTIONS_FILENAME
+        # stringhe precalcolate per il path di scrittura (niente with_suffix ad ogni save)
+        self._path_str = str(self.path)
+        self._tmp_str = self._path_str + ".tmp"
+        self._bak_str = self._path_str + ".bak"
+        # ((mtime_ns, size), dict normalizzato) dell'ultimo load
+        self._cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+        # ((mtime_ns, size), payload) dell'ultima scrittura: salta i save identici
+        self._last_written: Optional[Tuple[Tuple[int, int], bytes]] = None
 
     # ---------- public API ----------
     def load_or_create(self) -> Dict[str, Any]:
-        if not self.project_dir.exists():
-            # in IDE il progetto dovrebbe esistere già, ma teniamo robusto
-            self.project_dir.mkdir(parents=True, exist_ok=True)
-
-        if not self.path.exists():
+        try:
+            st = os.stat(self._path_str)
+        except FileNotFoundError:
+            if not self.project_dir.exists():
+                # in IDE il progetto dovrebbe esistere già, ma teniamo robusto
+                self.project_dir.mkdir(parents=True, exist_ok=True)
             data = self.default_data()
             self.save(data)
             return data
 
+        # file invariato (mtime+size): riuso il dict già normalizzato, niente parse
+        key = (st.st_mtime_ns, st.st_size)
+        if self._cache is not None and self._cache[0] == key:
+            return self._cache[1]
+
         try:
-            data = json.loads(self.path.read_text(encoding="utf-8"))
-            return self._normalize(data)
+            if orjson is not None:
+                data = orjson.loads(self.path.read_bytes())
+            else:
+                data = json.loads(self.path.read_bytes())
+            data = self._normalize(data)
+            self._cache = (key, data)
+            return data
         except Exception:
             # Backup del file corrotto e ricreazione
             try:
-                bak = self.path.with_suffix(self.path.suffix + ".bak")
-                self.path.replace(bak)
+                os.replace(self._path_str, self._bak_str)
             except Exception:
                 pass
             data = self.default_data()
             self.save(data)
             return data
 
-    def save(self, data: Dict[str, Any]) -> None:
+    def save(self, data: Dict[str, Any], pretty: bool = False) -> None:
+        """Scrive compatto (file non editato a mano); pretty=True per indent=2."""
         data = self._normalize(data)
-        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
-        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-        tmp.replace(self.path)
+        if orjson is not None:
+            payload = orjson.dumps(data, option=_ORJSON_OPT_PRETTY if pretty else _ORJSON_OPT_COMPACT)
+        elif pretty:
+            payload = (json.dumps(data, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+        else:
+            payload = (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+        # stesso payload e file non toccato da altri dopo l'ultima scrittura: niente I/O
+        last = self._last_written
+        if last is not None and last[1] == payload:
+            try:
+                st = os.stat(self._path_str)
+                if last[0] == (st.st_mtime_ns, st.st_size):
+                    return
+            except OSError:
+                pass
+
+        self._cache = None
+        fd = os.open(self._tmp_str, _WRITE_FLAGS, 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.replace(self._tmp_str, self._path_str)
+        st = os.stat(self._path_str)
+        self._last_written = ((st.st_mtime_ns, st.st_size), payload)
 
     def load_profiles(self) -> Tuple[str, List[ConnProfile]]:
         data = self.load_or_create()
@@ -89,6 +149,14 @@ class ConnectionStore:
         data = self._data_from_profiles(selected, profiles)
         self.save(data)
 
+    def save_selected_only(self, selected: str) -> None:
+        """Aggiorna solo 'selected' (cambio combo): se su disco è già quello, niente scrittura."""
+        selected = (selected or "").strip()
+        data = self.load_or_create()
+        if data.get("selected") == selected:
+            return
+        self.save({**data, "selected": selected})
+
     # ---------- defaults/normalize ----------
     def default_data(self) -> Dict[str, Any]:
         return {
@@ -112,17 +180,14 @@ class ConnectionStore:
         if not isinstance(profs, list):
             profs = []
 
-        seen: set[str] = set()
-        norm_profiles: List[Dict[str, Any]] = []
+        # dict per name: unicità + ordine di inserimento
+        uniq: Dict[str, Dict[str, Any]] = {}
         for p in profs:
             if not isinstance(p, dict):
                 continue
             name = str(p.get("name", "") or "").strip()
-            if not name:
-                continue
-            if name in seen:
+            if not name or name in uniq:
                 continue
-            seen.add(name)
 
             host = str(p.get("host", "") or "").strip()
             port = p.get("port", DEFAULT_PORT)
@@ -133,15 +198,18 @@ class ConnectionStore:
             if port_i < 1 or port_i > 65535:
                 port_i = DEFAULT_PORT
 
-            norm_profiles.append({"name": name, "host": host, "port": port_i})
+            uniq[name] = {"name": name, "host": host, "port": port_i}
 
-        if not norm_profiles:
+        if uniq:
+            norm_profiles = list(uniq.values())
+        else:
             norm_profiles = list(self.default_data()["profiles"])  # type: ignore[index]
+            uniq = {p["name"]: p for p in norm_profiles}
 
         out["profiles"] = norm_profiles
 
         selected = out["selected"]
-        if not selected or selected not in {p["name"] for p in norm_profiles}:
+        if not selected or selected not in uniq:
             out["selected"] = norm_profiles[0]["name"]
 
         return out
@@ -168,30 +236,28 @@ class ConnectionStore:
 
     def _data_from_profiles(self, selected: str, profiles: List[ConnProfile]) -> Dict[str, Any]:
         # unicità per name
-        uniq: List[ConnProfile] = []
-        seen: set[str] = set()
+        uniq: Dict[str, ConnProfile] = {}
         for p in profiles:
             name = (p.name or "").strip()
-            if not name or name in seen:
+            if not name or name in uniq:
                 continue
-            seen.add(name)
             host = (p.host or "").strip()
             port = int(p.port)
             if port < 1 or port > 65535:
                 port = DEFAULT_PORT
-            uniq.append(ConnProfile(name=name, host=host, port=port))
+            uniq[name] = ConnProfile(name=name, host=host, port=port)
 
         if not uniq:
             d = self.default_data()
-            uniq = self._profiles_from_data(d)
+            uniq = {p.name: p for p in self._profiles_from_data(d)}
 
-        if not selected or selected not in {p.name for p in uniq}:
-            selected = uniq[0].name
+        if not selected or selected not in uniq:
+            selected = next(iter(uniq))
 
         return {
             "schema_version": SCHEMA_VERSION_CONNECTIONS,
             "selected": selected,
-            "profiles": [{"name": p.name, "host": p.host, "port": int(p.port)} for p in uniq],
+            "profiles": [{"name": p.name, "host": p.host, "port": int(p.port)} for p in uniq.values()],
         }
 
 
@@ -1,22 +1,110 @@
 # parte 6/9 — ide/dialogs.py
 #from __future__ import annotations
 
+import os
+from operator import attrgetter
 from pathlib import Path
 from typing import Optional, Tuple
 
 from PySide6 import QtCore, QtWidgets
 
+from ide.qt_jobs import run_job
 from ide.runtime_client import RuntimeProfile
 from ide.connection_store import ConnectionStore, ConnProfile
 from ide.utils import default_projects_dir, load_json
 
 
+# project.json path -> (mtime_ns, size, name): evita read+parse ad ogni "Aggiorna"
+_PROJECT_NAME_CACHE: dict[str, tuple[int, int, str]] = {}
+_PROJECT_NAME_CACHE_MAX = 512
+
+
+def _cached_project_name(pj: str, st: os.stat_result, fallback: str) -> str:
+    hit = _PROJECT_NAME_CACHE.get(pj)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+
+    name = str(load_json(Path(pj)).get("name", fallback))
+
+    if pj not in _PROJECT_NAME_CACHE and len(_PROJECT_NAME_CACHE) >= _PROJECT_NAME_CACHE_MAX:
+        # FIFO: via la entry più vecchia
+        _PROJECT_NAME_CACHE.pop(next(iter(_PROJECT_NAME_CACHE)))
+    _PROJECT_NAME_CACHE[pj] = (st.st_mtime_ns, st.st_size, name)
+    return name
+
+
+def _project_display(path: str) -> str:
+    """Testo lista per una cartella progetto: 'nome  (cartella)' se il nome differisce."""
+    folder = os.path.basename(path)
+    try:
+        pj = os.path.join(path, "project.json")
+        name = _cached_project_name(pj, os.stat(pj), folder)
+        if name and name != folder:
+            return f"{name}  ({folder})"
+    except Exception:
+        pass
+    return folder
+
+
+# ordine come sorted(Path.iterdir()): case-insensitive solo dove normcase lo è (Windows)
+if os.path.normcase("A") == "A":
+    _entry_sort_key = attrgetter("name")
+else:
+    def _entry_sort_key(e: os.DirEntry) -> str:
+        return os.path.normcase(e.name)
+
+
+def _scan_project_dirs(base: str) -> list[tuple[Optional[str], str]]:
+    """Job-safe (niente Qt): cartelle di base con project.json, ordinate per nome."""
+    # scandir: tipo entry dal DirEntry (niente stat extra per ogni sottocartella)
+    with os.scandir(base) as it:
+        entries = sorted(it, key=_entry_sort_key)
+
+    # solo cartelle con project.json: il nome si legge lazy nel model
+    rows: list[tuple[Optional[str], str]] = []
+    for e in entries:
+        if not e.is_dir():
+            continue
+        if os.path.isfile(os.path.join(e.path, "project.json")):
+            rows.append((None, e.path))
+    return rows
+
+
+class ProjectListModel(QtCore.QAbstractListModel):
+    """Righe (display|None, path). Il nome da project.json si legge solo quando la view lo chiede."""
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._rows: list[list] = []
+
+    def set_rows(self, rows: list[tuple[Optional[str], str]]) -> None:
+        self.beginResetModel()
+        self._rows = [[d, p] for d, p in rows]
+        self.endResetModel()
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            if row[0] is None:
+                row[0] = _project_display(row[1])
+            return row[0]
+        if role == QtCore.Qt.UserRole:
+            return row[1]
+        return None
+
+
 class ProjectPickerDialog(QtWidgets.QDialog):
     def __init__(self, base_dir: Path, parent: QtWidgets.QWidget | None = None) -> None:
         super().__init__(parent)
         self.setWindowTitle("Apri progetto")
         self.setModal(True)
         self._selected: Optional[Path] = None
+        self._scan_seq = 0
 
         self.ed_base = QtWidgets.QLineEdit(str(base_dir))
         self.btn_browse = QtWidgets.QPushButton("...")
@@ -29,7 +117,11 @@ class ProjectPickerDialog(QtWidgets.QDialog):
         top.addWidget(self.btn_browse)
         top.addWidget(self.btn_refresh)
 
-        self.list = QtWidgets.QListWidget()
+        self.model = ProjectListModel(self)
+        self.list = QtWidgets.QListView()
+        self.list.setModel(self.model)
+        self.list.setUniformItemSizes(True)
+        self.list.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.list.setStyleSheet("font-size:11px;")
 
         hint = QtWidgets.QLabel("Doppio click su un progetto per aprirlo")
@@ -47,7 +139,7 @@ class ProjectPickerDialog(QtWidgets.QDialog):
         btns.rejected.connect(self.reject)
         self.btn_browse.clicked.connect(self.browse)
         self.btn_refresh.clicked.connect(self.refresh)
-        self.list.itemDoubleClicked.connect(self.on_double)
+        self.list.doubleClicked.connect(self.on_double)
 
         self.refresh()
 
@@ -58,43 +150,37 @@ class ProjectPickerDialog(QtWidgets.QDialog):
             self.refresh()
 
     def refresh(self) -> None:
-        self.list.clear()
-        base = Path(self.ed_base.text().strip()).expanduser()
-        if not base.exists() or not base.is_dir():
-            self.list.addItem("(cartella non valida)")
+        # stringhe os.path: un solo stat per esistenza + is-dir, niente Path intermedi
+        base = os.path.expanduser(self.ed_base.text().strip())
+        if not base or not os.path.isdir(base):
+            self._scan_seq += 1  # scarta eventuali scansioni in corso
+            self.model.set_rows([("(cartella non valida)", "")])
             return
 
-        projects: list[tuple[str, Path]] = []
-        for sub in sorted(base.iterdir()):
-            if not sub.is_dir():
-                continue
-            pj = sub / "project.json"
-            if pj.exists():
-                display = sub.name
-                try:
-                    name = str(load_json(pj).get("name", sub.name))
-                    if name and name != sub.name:
-                        display = f"{name}  ({sub.name})"
-                except Exception:
-                    pass
-                projects.append((display, sub))
-
-        if not projects:
-            self.list.addItem("(nessun progetto trovato)")
-            return
+        # scansione su threadpool: cartelle lente/di rete non bloccano il dialog
+        self._scan_seq += 1
+        seq = self._scan_seq
+        self.model.set_rows([("(scansione…)", "")])
+
+        def _done(rows: list) -> None:
+            if seq != self._scan_seq:
+                return  # risultato di una scansione superata
+            self.model.set_rows(rows or [("(nessun progetto trovato)", "")])
+
+        def _err(msg: str) -> None:
+            if seq != self._scan_seq:
+                return
+            self.model.set_rows([(f"(errore scansione: {msg})", "")])
 
-        for display, path in projects:
-            it = QtWidgets.QListWidgetItem(display)
-            it.setData(QtCore.Qt.UserRole, str(path))
-            self.list.addItem(it)
+        self._scan_job = run_job(_scan_project_dirs, base, on_ok=_done, on_err=_err)
 
-    def on_double(self, item: QtWidgets.QListWidgetItem) -> None:
-        p = item.data(QtCore.Qt.UserRole)
+    def on_double(self, index: QtCore.QModelIndex) -> None:
+        p = index.data(QtCore.Qt.UserRole)
         if not p:
             return
-        path = Path(str(p))
-        if (path / "project.json").exists():
-            self._selected = path
+        p = str(p)
+        if os.path.exists(os.path.join(p, "project.json")):
+            self._selected = Path(p)
             self.accept()
 
     def selected_folder(self) -> Optional[Path]:
@@ -196,6 +282,8 @@ class SettingsWidget(QtWidgets.QWidget):
     """
 
     profile_changed = QtCore.Signal(RuntimeProfile)
+    # True mentre i profili del progetto si caricano: il profilo attivo non è ancora quello del progetto
+    loading_changed = QtCore.Signal(bool)
 
     def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
         super().__init__(parent)
@@ -203,8 +291,15 @@ class SettingsWidget(QtWidgets.QWidget):
         self._project_root: Optional[Path] = None
         self._store: Optional[ConnectionStore] = None
         self._profiles: list[ConnProfile] = []
+        # indice name -> profilo (stessi oggetti di _profiles), riallineato ad ogni modifica
+        self._by_name: dict[str, ConnProfile] = {}
         self._selected: str = ""
         self._in_ui = False
+        # ultimo profilo (name, host, port) emesso: evita emit ripetuti dello stesso profilo
+        self._last_activated: Optional[tuple[str, str, int]] = None
+        # scarta i load profili superati (cambio/chiusura progetto durante il job)
+        self._load_seq = 0
+        self._loading = False
 
         # stato per rinomina in 2 fasi
         self._rename_pending_old: Optional[str] = None
@@ -220,6 +315,9 @@ class SettingsWidget(QtWidgets.QWidget):
         self.lbl_msg.setStyleSheet("color:#0a0; font-size:11px; font-weight:600;")
 
         self.cbo = QtWidgets.QComboBox()
+        # model a stringhe: niente QStandardItem per voce ad ogni rebuild
+        self._cbo_model = QtCore.QStringListModel(self)
+        self.cbo.setModel(self._cbo_model)
         self.ed_name = QtWidgets.QLineEdit()
         self.ed_host = QtWidgets.QLineEdit()
 
@@ -276,27 +374,57 @@ class SettingsWidget(QtWidgets.QWidget):
     # API chiamate da MainWindow
     # --------------------
     def set_project(self, project_root: Path) -> None:
-        """Abilita il widget e carica i profili dal progetto."""
-        self._project_root = project_root.resolve()
-        self._store = ConnectionStore(self._project_root)
-        self._selected, self._profiles = self._store.load_profiles()
+        """Abilita il widget e carica i profili dal progetto (crea/legge connections.json su threadpool)."""
+        root = project_root.resolve()
+        store = ConnectionStore(root)
+        self._project_root = root
+        # _store resta None finché i profili non arrivano: combo/pulsanti ignorati
+        self._store = None
+        self._profiles = []
+        self._by_name = {}
         self._rename_pending_old = None
 
-        self.lbl_project.setText(f"Progetto: {self._project_root}")
-        self._rebuild_combo(select_name=self._selected)
-        self._load_fields_from_combo()
-        self._set_enabled(True)
+        self._load_seq += 1
+        seq = self._load_seq
+        self.lbl_project.setText(f"Progetto: {root} — caricamento…")
+        self._set_enabled(False)
+        self._set_loading(True)
+
+        def _done(res: tuple) -> None:
+            if seq != self._load_seq:
+                return  # progetto cambiato nel frattempo
+            self._store = store
+            self._selected, self._profiles = res
+            self._reindex()
+
+            self.lbl_project.setText(f"Progetto: {root}")
+            self._rebuild_combo(select_name=self._selected)
+            self._load_fields_from_combo()
+            self._set_enabled(True)
+
+            # Mostra ed applica il selected (senza riscrivere i profili, ma salviamo il selected se manca)
+            self._activate_profile(self._selected, persist_selected=True)
+            self._set_loading(False)
+
+        def _err(msg: str) -> None:
+            if seq != self._load_seq:
+                return
+            self.lbl_project.setText(f"Progetto: {root} — errore profili: {msg}")
+            self._set_loading(False)
 
-        # Mostra ed applica il selected (senza riscrivere i profili, ma salviamo il selected se manca)
-        self._activate_profile(self._selected, persist_selected=True)
+        # load_profiles -> load_or_create: anche la creazione di connections.json avviene nel job
+        self._load_job = run_job(store.load_profiles, on_ok=_done, on_err=_err)
 
     def clear_project(self) -> None:
         """Disabilita e svuota (runtime OFF)."""
+        self._load_seq += 1
         self._project_root = None
         self._store = None
         self._profiles = []
+        self._by_name = {}
         self._selected = ""
         self._rename_pending_old = None
+        self._last_activated = None
 
         self.lbl_project.setText("(nessun progetto aperto) — runtime OFF")
         self._set_active_label(None)
@@ -304,7 +432,7 @@ class SettingsWidget(QtWidgets.QWidget):
 
         self._in_ui = True
         try:
-            self.cbo.clear()
+            self._cbo_model.setStringList([])
             self.ed_name.setText("")
             self.ed_host.setText("")
             self.sp_port.setValue(1963)
@@ -312,10 +440,19 @@ class SettingsWidget(QtWidgets.QWidget):
             self._in_ui = False
 
         self._set_enabled(False)
+        self._set_loading(False)
+
+    def is_loading(self) -> bool:
+        return self._loading
 
     # --------------------
     # Internal helpers
     # --------------------
+    def _set_loading(self, loading: bool) -> None:
+        if loading != self._loading:
+            self._loading = loading
+            self.loading_changed.emit(loading)
+
     def _set_enabled(self, enabled: bool) -> None:
         self.cbo.setEnabled(enabled)
         self.ed_name.setEnabled(enabled)
@@ -329,18 +466,15 @@ class SettingsWidget(QtWidgets.QWidget):
     def _rebuild_combo(self, select_name: str = "") -> None:
         self._in_ui = True
         try:
-            self.cbo.clear()
-            for p in self._profiles:
-                self.cbo.addItem(p.name)
-            if self.cbo.count() == 0:
+            names = [p.name for p in self._profiles]
+            self._cbo_model.setStringList(names)
+            if not names:
                 return
 
             idx = 0
             if select_name:
-                for i, p in enumerate(self._profiles):
-                    if p.name == select_name:
-                        idx = i
-                        break
+                name_to_idx = {p.name: i for i, p in enumerate(self._profiles)}
+                idx = name_to_idx.get(select_name, 0)
             self.cbo.setCurrentIndex(idx)
         finally:
             self._in_ui = False
@@ -348,11 +482,11 @@ class SettingsWidget(QtWidgets.QWidget):
     def _current_combo_name(self) -> str:
         return (self.cbo.currentText() or "").strip()
 
+    def _reindex(self) -> None:
+        self._by_name = {p.name: p for p in self._profiles}
+
     def _find(self, name: str) -> Optional[ConnProfile]:
-        for p in self._profiles:
-            if p.name == name:
-                return p
-        return None
+        return self._by_name.get(name)
 
     def _persist_selected_and_profiles(self, selected_name: str) -> None:
         if not self._store:
@@ -364,8 +498,8 @@ class SettingsWidget(QtWidgets.QWidget):
         if not self._store:
             return
         self._selected = selected_name
-        # scrive solo il campo selected, ma usando save_profiles (i profili restano uguali)
-        self._store.save_profiles(self._selected, self._profiles)
+        # profili invariati: aggiorna solo selected (e solo se cambiato su disco)
+        self._store.save_selected_only(self._selected)
 
     def _load_fields_from_combo(self) -> None:
         if self._in_ui:
@@ -377,11 +511,16 @@ class SettingsWidget(QtWidgets.QWidget):
 
         self._rename_pending_old = None
 
+        port = int(p.port)
+        # campi già allineati (stesso profilo riselezionato): niente setText/setValue
+        if self.ed_name.text() == p.name and self.ed_host.text() == p.host and self.sp_port.value() == port:
+            return
+
         self._in_ui = True
         try:
             self.ed_name.setText(p.name)
             self.ed_host.setText(p.host)
-            self.sp_port.setValue(int(p.port))
+            self.sp_port.setValue(port)
         finally:
             self._in_ui = False
 
@@ -389,7 +528,11 @@ class SettingsWidget(QtWidgets.QWidget):
         p = self._find(name)
         if not p:
             return
-        self.profile_changed.emit(RuntimeProfile(p.name, p.host, int(p.port)))
+        key = (p.name, p.host, int(p.port))
+        if key == self._last_activated:
+            return
+        self._last_activated = key
+        self.profile_changed.emit(RuntimeProfile(*key))
 
     def _set_active_label(self, profile_name: Optional[str]) -> None:
         if not profile_name:
@@ -474,6 +617,7 @@ class SettingsWidget(QtWidgets.QWidget):
             ex.port = port
         else:
             self._profiles.append(ConnProfile(name=name, host=host, port=port))
+            self._reindex()
 
         try:
             self._persist_selected_and_profiles(name)
@@ -527,6 +671,7 @@ class SettingsWidget(QtWidgets.QWidget):
         p.host = self.ed_host.text().strip()
         p.port = int(self.sp_port.value())
         p.name = new
+        self._reindex()
 
         try:
             self._persist_selected_and_profiles(new)
@@ -563,6 +708,7 @@ class SettingsWidget(QtWidgets.QWidget):
             return
 
         self._profiles = [p for p in self._profiles if p.name != name]
+        self._reindex()
         new_sel = self._profiles[0].name
 
         try:
@@ -9,6 +9,19 @@ from PySide6 import QtCore, QtGui, QtWidgets
 from ide.config import CODE_FONT_FAMILY, CODE_FONT_SIZE_PT, LINE_NUMBER_GAP_CM
 
 
+# font codice + metriche condivisi da tutti gli editor (lazy: serve una QApplication)
+_CODE_FONT: Optional[QtGui.QFont] = None
+_CODE_FM: Optional[QtGui.QFontMetrics] = None
+
+
+def _code_font() -> tuple[QtGui.QFont, QtGui.QFontMetrics]:
+    global _CODE_FONT, _CODE_FM
+    if _CODE_FONT is None:
+        _CODE_FONT = QtGui.QFont(CODE_FONT_FAMILY, CODE_FONT_SIZE_PT)
+        _CODE_FM = QtGui.QFontMetrics(_CODE_FONT)
+    return _CODE_FONT, _CODE_FM
+
+
 class LineNumberArea(QtWidgets.QWidget):
     def __init__(self, editor: "StEditor") -> None:
         super().__init__(editor)
@@ -27,15 +40,25 @@ class StEditor(QtWidgets.QPlainTextEdit):
         self.file_path = file_path
         self.display_title: Optional[str] = None
         self._dirty = False
-
-        f = QtGui.QFont(CODE_FONT_FAMILY, CODE_FONT_SIZE_PT)
+        self._dirty_armed = False
+        self._ln_update_pending = False
+        # selezione riga corrente: formato fisso, ad ogni movimento cambia solo il cursore
+        self._cur_line_sel = QtWidgets.QTextEdit.ExtraSelection()
+        self._cur_line_sel.format.setBackground(QtGui.QColor(250, 250, 230))
+        self._cur_line_sel.format.setProperty(QtGui.QTextFormat.FullWidthSelection, True)
+        # "1", "2", ... riusati dal paint dei numeri riga (cresce con blockCount)
+        self._lineno_cache: list[str] = []
+
+        f, fm = _code_font()
         self.setFont(f)
         self.document().setDefaultFont(f)
+        self._refresh_metrics(fm)
+        self._refresh_gap()
 
         self.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
-        self.setTabStopDistance(4 * QtGui.QFontMetrics(self.font()).horizontalAdvance(" "))
+        self.setTabStopDistance(4 * self._fm.horizontalAdvance(" "))
 
-        self.textChanged.connect(self._on_changed)
+        self._arm_dirty()
 
         self._ln_area = LineNumberArea(self)
         self._ln_area.setFont(self.font())
@@ -49,31 +72,87 @@ class StEditor(QtWidgets.QPlainTextEdit):
 
         self.load_from_disk()
 
-    def _gap_px(self) -> int:
+    def _refresh_metrics(self, fm: Optional[QtGui.QFontMetrics] = None) -> None:
+        """Da richiamare quando cambia il font: larghezza cifra + cache larghezza gutter."""
+        self._fm = fm if fm is not None else self.fontMetrics()
+        self._digit_adv = self._fm.horizontalAdvance("9")
+        self._ln_digits = 0
+        self._ln_width = 0
+
+    def _refresh_gap(self) -> None:
+        """Da richiamare quando cambia lo schermo (DPI): gap in px tra numeri riga e testo."""
         dpi = float(self.logicalDpiX() or 96.0)
-        return int((LINE_NUMBER_GAP_CM * dpi) / 2.54)
+        self._cached_gap_px = int((LINE_NUMBER_GAP_CM * dpi) / 2.54)
+
+    def changeEvent(self, event: QtCore.QEvent) -> None:
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.FontChange:
+            self._refresh_metrics()
+            if hasattr(self, "_ln_area"):
+                self.updateLineNumberAreaWidth(0)
+
+    def event(self, event: QtCore.QEvent) -> bool:
+        # ScreenChangeInternal arriva da event(), non da changeEvent()
+        if event.type() == QtCore.QEvent.ScreenChangeInternal:
+            self._refresh_gap()
+            if hasattr(self, "_ln_area"):
+                self.updateLineNumberAreaWidth(0)
+        return super().event(event)
+
+    def _gap_px(self) -> int:
+        return self._cached_gap_px
+
+    def _arm_dirty(self) -> None:
+        if not self._dirty_armed:
+            self.textChanged.connect(self._on_changed)
+            self._dirty_armed = True
 
     def _on_changed(self) -> None:
+        # basta il primo cambio: scollego fino al prossimo save/load
         self._dirty = True
+        self.textChanged.disconnect(self._on_changed)
+        self._dirty_armed = False
 
     def is_dirty(self) -> bool:
         return self._dirty
 
     def load_from_disk(self) -> None:
-        txt = self.file_path.read_text(encoding="utf-8")
+        f = QtCore.QFile(str(self.file_path))
+        if not f.open(QtCore.QIODevice.ReadOnly):
+            raise OSError(f"{self.file_path}: {f.errorString()}")
+        try:
+            data = bytes(f.readAll())
+        finally:
+            f.close()
+        # decode stretto come read_text: UTF-8 non valido -> UnicodeDecodeError (niente U+FFFD
+        # riscritti al prossimo save); BOM lasciato nel testo, newline universali
+        txt = data.decode("utf-8")
+        if "\r" in txt:
+            txt = txt.replace("\r\n", "\n").replace("\r", "\n")
         self.blockSignals(True)
         self.setPlainText(txt)
         self.blockSignals(False)
         self._dirty = False
+        self._arm_dirty()
 
     def save_to_disk(self) -> None:
-        self.file_path.write_text(self.toPlainText(), encoding="utf-8")
+        # QSaveFile: scrive su file temporaneo e rinomina su commit() (niente file troncati)
+        sf = QtCore.QSaveFile(str(self.file_path))
+        if not sf.open(QtCore.QIODevice.WriteOnly | QtCore.QIODevice.Text):
+            raise OSError(f"{self.file_path}: {sf.errorString()}")
+        sf.write(self.toPlainText().encode("utf-8"))
+        if not sf.commit():
+            raise OSError(f"{self.file_path}: {sf.errorString()}")
         self._dirty = False
+        self._arm_dirty()
 
     def lineNumberAreaWidth(self) -> int:
+        # ricalcolo solo quando cambia il numero di cifre (10, 100, 1000 righe...)
         digits = len(str(max(1, self.blockCount())))
-        fm = self.fontMetrics()
-        return 8 + fm.horizontalAdvance("9") * digits
+        if digits != self._ln_digits:
+            self._ln_digits = digits
+            self._ln_width = 8 + self._digit_adv * digits
+        return self._ln_width
 
     def updateLineNumberAreaWidth(self, _newBlockCount: int) -> None:
         self.setViewportMargins(self.lineNumberAreaWidth() + self._gap_px(), 0, 0, 0)
@@ -81,11 +160,18 @@ class StEditor(QtWidgets.QPlainTextEdit):
     def updateLineNumberArea(self, rect: QtCore.QRect, dy: int) -> None:
         if dy:
             self._ln_area.scroll(0, dy)
-        else:
-            self._ln_area.update(0, rect.y(), self._ln_area.width(), rect.height())
+        elif not self._ln_update_pending:
+            # più updateRequest nello stesso giro di event loop -> un solo update del gutter
+            self._ln_update_pending = True
+            # context object self: se il tab viene chiuso prima, la chiamata è scartata
+            QtCore.QTimer.singleShot(0, self, self._flush_ln_update)
         if rect.contains(self.viewport().rect()):
             self.updateLineNumberAreaWidth(0)
 
+    def _flush_ln_update(self) -> None:
+        self._ln_update_pending = False
+        self._ln_area.update()
+
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
         super().resizeEvent(event)
         cr = self.contentsRect()
@@ -96,33 +182,42 @@ class StEditor(QtWidgets.QPlainTextEdit):
         painter.fillRect(event.rect(), QtGui.QColor(245, 245, 245))
         painter.setPen(QtGui.QColor(120, 120, 120))
 
+        # setPlainText avviene a segnali bloccati: allineo la cache qui, non su blockCountChanged
+        labels = self._lineno_cache
+        n = self.blockCount()
+        if len(labels) < n:
+            labels.extend(str(i) for i in range(len(labels) + 1, n + 1))
+
+        rect = event.rect()
+        rect_top = rect.top()
+        rect_bottom = rect.bottom()
+        right_edge = self._ln_area.width() - 4
+        align = QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter
+
         block = self.firstVisibleBlock()
         blockNumber = block.blockNumber()
         top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
 
-        while block.isValid() and top <= event.rect().bottom():
+        block_rect = self.blockBoundingRect
+        draw = painter.drawText
+
+        while block.isValid():
+            if top > rect_bottom:
+                break
+            # blocchi invisibili (altezza 0): niente blockBoundingRect
             if block.isVisible():
-                h = int(self.blockBoundingRect(block).height())
-                if (top + h) >= event.rect().top():
-                    painter.drawText(
-                        0,
-                        top,
-                        self._ln_area.width() - 4,
-                        h,
-                        QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter,
-                        str(blockNumber + 1),
-                    )
+                h = int(block_rect(block).height())
+                if (top + h) >= rect_top:
+                    draw(0, top, right_edge, h, align, labels[blockNumber])
                 top += h
             block = block.next()
             blockNumber += 1
 
     def highlightCurrentLine(self) -> None:
-        extraSelections: list[QtWidgets.QTextEdit.ExtraSelection] = []
-        if not self.isReadOnly():
-            selection = QtWidgets.QTextEdit.ExtraSelection()
-            selection.format.setBackground(QtGui.QColor(250, 250, 230))
-            selection.format.setProperty(QtGui.QTextFormat.FullWidthSelection, True)
-            selection.cursor = self.textCursor()
-            selection.cursor.clearSelection()
-            extraSelections.append(selection)
-        self.setExtraSelections(extraSelections)
+        if self.isReadOnly():
+            self.setExtraSelections([])
+            return
+        cur = self.textCursor()
+        cur.clearSelection()
+        self._cur_line_sel.cursor = cur
+        self.setExtraSelections([self._cur_line_sel])
@@ -7,10 +7,10 @@ import sys
 from pathlib import Path
 from typing import Optional
 
-from PySide6 import QtCore, QtWidgets
+# solo QtCore al caricamento: QtWidgets e la finestra principale si importano in main()
+from PySide6 import QtCore
 
 from ide.config import APP_NAME
-from ide.main_window import MainWindow
 
 
 # ----------------------------
@@ -27,21 +27,30 @@ def acquire_ide_lock() -> bool:
 
     lf = QtCore.QLockFile(str(p / "knetx_ide.lock"))
     lf.setStaleLockTime(5_000)
-    if lf.tryLock(100):
+    # niente attesa: un lock stale (processo morto) viene comunque rimosso da tryLock
+    if lf.tryLock(0):
         _lock_file = lf
         return True
     return False
 
 
 def main() -> int:
+    # nomi statici: QStandardPaths (lock) li usa anche senza QApplication
+    QtCore.QCoreApplication.setOrganizationName("SplKnetx")
+    QtCore.QCoreApplication.setApplicationName(APP_NAME)
+    locked = acquire_ide_lock()
+
+    from PySide6 import QtWidgets
+
     app = QtWidgets.QApplication(sys.argv)
-    app.setOrganizationName("SplKnetx")
-    app.setApplicationName(APP_NAME)
 
-    if not acquire_ide_lock():
+    if not locked:
         QtWidgets.QMessageBox.information(None, APP_NAME, "IDE già in esecuzione (single-instance).")
         return 2
 
+    # seconda istanza: esce sopra senza caricare editor, dialog, client runtime
+    from ide.main_window import MainWindow
+
     w = MainWindow()
     w.resize(1120, 740)
     w.show()
@@ -7,17 +7,45 @@ from typing import Any, Dict, Optional, Tuple
 
 from PySide6 import QtCore, QtGui, QtWidgets
 from ide.qt_jobs import run_job
-from ide.compile_send import compile_project, send_project, compile_job, send_job
+from ide.compile_send import _clear_client_cache, compile_job, compile_project, send_job, send_project
 from ide.config import APP_NAME, ROLE_FILE, ROLE_TITLE, ROLE_NODE_KIND, ROLE_PAGE_ID, ROLE_PAGE_NAME, ROLE_SHEET_INDEX0
 from ide.dialogs import AddPageDialog, NewProjectDialog, ProjectPickerDialog, SettingsWidget
 from ide.page_tab import PageEditorTab
 from ide.project_model import Project, add_page_to_project, create_project_skeleton, load_project
 from ide.runtime_client import RuntimeClient, RuntimeProfile
 from ide.utils import default_projects_dir, ensure_dir, folder_effectively_empty, load_json, utc_now_iso, write_json
-from ide.connection_store import ensure_connections_file
+
+# ping periodico di fallback (runtime senza SUBSCRIBE_STATUS): parte da
+# STATUS_POLL_MS e si allunga finché il runtime risponde, fino a STATUS_POLL_MAX_MS
+STATUS_POLL_MS = 1200
+STATUS_POLL_MAX_MS = 10000
+STATUS_POLL_MAX_SHIFT = 3
+
+# Stylesheet unico della finestra principale (selettori per objectName)
+APP_QSS = (
+    "QMainWindow{font-size:11px;}"
+    "QToolBar{spacing:4px;}"
+    "QToolButton{padding:2px 6px;}"
+    "QTabBar::tab{padding:4px 8px; margin:1px;}"
+    "QSplitter::handle{background:#ddd;}"
+    "QTreeWidget#projectTree{font-size:11px;}"
+    "QPlainTextEdit#outputLog{font-size:11px;}"
+    "QPlainTextEdit#errorLog{font-size:11px;}"
+    "QTreeWidget#diagTree{font-size:11px;}"
+    "QTabBar#sheetBar::tab{font-size:10px; padding:2px 10px; margin-left:2px;"
+    "background:#d9d9d9; border:1px solid #b8b8b8; border-top-left-radius:3px; border-top-right-radius:3px;}"
+    "QTabBar#sheetBar::tab:selected{background:#f2c180; border-color:#c9a36c;}"
+    "QTabBar#sheetBar::tab:!selected{color:#222;}"
+    'QLabel#runtimeStatus[online="true"]{color:#0a0; font-weight:600;}'
+    'QLabel#runtimeStatus[online="false"]{color:#777; font-weight:600;}'
+)
 
 
 class MainWindow(QtWidgets.QMainWindow):
+    # metodo di PageEditorTab per cambiare foglio: risolto una volta sola
+    # (None = non ancora cercato, "" = non trovato)
+    _SHEET_SETTER_NAME: Optional[str] = None
+
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle(APP_NAME)
@@ -29,6 +57,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.client = RuntimeClient()
         self._ping_inflight = False
         self._last_ping_ms = 0
+        self._ok_streak = 0
         self._connected = False
 
         # Page tabs map: page_id -> PageEditorTab
@@ -38,10 +67,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self._sheetbar_files: list[Path] = []
         self._sheetbar_page_id: Optional[str] = None
         self._sheetbar_page_name: Optional[str] = None
+        # page_id -> (entry pages.json, page_name, [(testo tab, tooltip, file risolto)])
+        self._sheetbar_cache: Dict[str, Tuple[Any, str, list[Tuple[str, str, Path]]]] = {}
 
         # anti-loop selection sync
         self._sync_tree_guard = False
 
+        # indice item albero progetto (riempito da populate_tree_from_project)
+        self._reset_tree_index()
+
         self._build_toolbar()
         self._build_central()
         self._build_bottom_sheetbar()
@@ -52,7 +86,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
         self.timer = QtCore.QTimer(self)
-        self.timer.setInterval(1200)
+        self.timer.setInterval(STATUS_POLL_MS)
         self.timer.timeout.connect(self.refresh_status)
      # NON partiamo con ping automatici: si parte solo dopo "Connetti"
         self.timer.stop()
@@ -61,6 +95,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.populate_tree_empty()
         self.clear_sheetbar()
 
+        # uscita: chiude subito il socket persistente verso il runtime
+        app = QtWidgets.QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._on_about_to_quit)
+
     # ----------------
     # UI build
     # ----------------
@@ -83,40 +122,24 @@ class MainWindow(QtWidgets.QMainWindow):
         tb.addAction(self.act_compile)
         tb.addAction(self.act_download)
 
-        # --- signals ---
-        # Settings: se hai tabs + tab_settings, porta lì; altrimenti prova show_settings() se esiste
-        if hasattr(self, "tabs") and hasattr(self, "tab_settings"):
-            self.act_settings.triggered.connect(lambda: self.tabs.setCurrentWidget(self.tab_settings))
-        else:
-            fn_settings = getattr(self, "show_settings", None)
-            if callable(fn_settings):
-                self.act_settings.triggered.connect(fn_settings)
+        # --- signals --- (metodi slot diretti: niente lambda né getattr risolti a runtime)
+        # Settings: slot risolve self.tabs al click (la toolbar è costruita prima del centrale)
+        self.act_settings.triggered.connect(self._show_settings_tab)
 
         # Connect/Disconnect toggle (STEP 5)
         self.act_connect.triggered.connect(self.toggle_connect)
 
-        # Compile
-        fn_compile = (
-            getattr(self, "do_compile", None)
-            or getattr(self, "compile_project", None)
-            or getattr(self, "stub_compile", None)
-        )
-        if callable(fn_compile):
-            self.act_compile.triggered.connect(fn_compile)
-
-        # Send/Download
-        fn_send = (
-            getattr(self, "do_send", None)
-            or getattr(self, "send_project", None)
-            or getattr(self, "stub_download", None)
-        )
-        if callable(fn_send):
-            self.act_download.triggered.connect(fn_send)
+        self.act_compile.triggered.connect(self.do_compile)
+        self.act_download.triggered.connect(self.do_send)
 
         # Testo iniziale coerente col flag self._connected
         if hasattr(self, "_set_connect_action_text"):
             self._set_connect_action_text()
 
+    @QtCore.Slot()
+    def _show_settings_tab(self) -> None:
+        self.tabs.setCurrentWidget(self.tab_settings)
+
     def _build_central(self) -> None:
         self.split = QtWidgets.QSplitter()
         self.split.setChildrenCollapsible(False)
@@ -124,8 +147,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tree = QtWidgets.QTreeWidget()
         self.tree.setHeaderHidden(True)
         self.tree.setIndentation(14)
-        self.tree.setStyleSheet("QTreeWidget{font-size:11px;}")
+        self.tree.setObjectName("projectTree")
         self.tree.itemClicked.connect(self.on_tree_clicked)
+        self.tree.itemExpanded.connect(self._on_tree_item_expanded)
 
         # Right click context menu
         self.tree.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
@@ -159,6 +183,7 @@ class MainWindow(QtWidgets.QMainWindow):
         lay_set.addWidget(self.settings)
         lay_set.addStretch(1)
         self.settings.profile_changed.connect(self.on_profile_changed)
+        self.settings.loading_changed.connect(self._on_profiles_loading)
 
         #self.output = QtWidgets.QPlainTextEdit()
         #self.output.setReadOnly(True)
@@ -169,13 +194,13 @@ class MainWindow(QtWidgets.QMainWindow):
         # ---- Output (log) + Diagnostics ----
         self.output = QtWidgets.QPlainTextEdit()
         self.output.setReadOnly(True)
-        self.output.setStyleSheet("font-size:11px;")
+        self.output.setObjectName("outputLog")
 
         self.diag = QtWidgets.QTreeWidget()
         self.diag.setHeaderLabels(["Sev", "File", "Line", "Msg"])
         self.diag.setRootIsDecorated(False)
         self.diag.setAlternatingRowColors(True)
-        self.diag.setStyleSheet("font-size:11px;")
+        self.diag.setObjectName("diagTree")
         self.diag.itemDoubleClicked.connect(self.on_diag_double_clicked)
 
         out_split = QtWidgets.QSplitter(QtCore.Qt.Vertical)
@@ -218,12 +243,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.sheetbar.setUsesScrollButtons(True)
         self.sheetbar.currentChanged.connect(self.on_sheetbar_changed)
 
-        self.sheetbar.setStyleSheet(
-            "QTabBar::tab{font-size:10px; padding:2px 10px; margin-left:2px;"
-            "background:#d9d9d9; border:1px solid #b8b8b8; border-top-left-radius:3px; border-top-right-radius:3px;}"
-            "QTabBar::tab:selected{background:#f2c180; border-color:#c9a36c;}"
-            "QTabBar::tab:!selected{color:#222;}"
-        )
+        self.sheetbar.setObjectName("sheetBar")
 
         hb.addWidget(self.sheetbar, 0, QtCore.Qt.AlignLeft)
         hb.addStretch(1)
@@ -231,6 +251,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def _build_statusbar(self) -> None:
         self.lbl_status = QtWidgets.QLabel("OFFLINE")
+        self.lbl_status.setObjectName("runtimeStatus")
+        # colore da APP_QSS via proprietà dinamica: niente setStyleSheet (e re-polish) a ogni stato
+        self.lbl_status.setProperty("online", False)
         sb = self.statusBar()
         sb.addWidget(self.lbl_status)
 
@@ -248,7 +271,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.error_log_view = QtWidgets.QPlainTextEdit()
         self.error_log_view.setReadOnly(True)
-        self.error_log_view.setStyleSheet("font-size:11px;")
+        self.error_log_view.setObjectName("errorLog")
         lay.addWidget(self.error_log_view, 1)
 
         btn_row = QtWidgets.QHBoxLayout()
@@ -259,6 +282,7 @@ class MainWindow(QtWidgets.QMainWindow):
         lay.addLayout(btn_row)
 
         self.error_log_window.installEventFilter(self)
+        # copia completa solo alla creazione: poi log() appende a entrambe le view
         self.error_log_view.setPlainText(self.output.toPlainText())
 
     def eventFilter(self, obj: QtCore.QObject, event: QtCore.QEvent) -> bool:
@@ -268,10 +292,10 @@ class MainWindow(QtWidgets.QMainWindow):
             self.btn_error_log.blockSignals(False)
         return super().eventFilter(obj, event)
 
+    @QtCore.Slot(bool)
     def toggle_error_log_window(self, checked: bool) -> None:
         self._ensure_error_log_window()
         if checked:
-            self.error_log_view.setPlainText(self.output.toPlainText())
             self.error_log_window.show()
             self.error_log_window.raise_()
             self.error_log_window.activateWindow()
@@ -283,13 +307,17 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QApplication.clipboard().setText(self.error_log_view.toPlainText())
 
     def _build_style(self) -> None:
-        self.setStyleSheet(
-            "QMainWindow{font-size:11px;}"
-            "QToolBar{spacing:4px;}"
-            "QToolButton{padding:2px 6px;}"
-            "QTabBar::tab{padding:4px 8px; margin:1px;}"
-            "QSplitter::handle{background:#ddd;}"
-        )
+        # un solo stylesheet sulla finestra: un parse, nessun polish per-widget
+        self.setStyleSheet(APP_QSS)
+
+    def _set_status_label(self, text: str, online: bool) -> None:
+        self.lbl_status.setText(text)
+        if self.lbl_status.property("online") != online:
+            # re-polish solo quando lo stato cambia, non a ogni aggiornamento
+            self.lbl_status.setProperty("online", online)
+            st = self.lbl_status.style()
+            st.unpolish(self.lbl_status)
+            st.polish(self.lbl_status)
 
     def _build_menus(self) -> None:
         mb = self.menuBar()
@@ -337,49 +365,62 @@ class MainWindow(QtWidgets.QMainWindow):
     def populate_tree_empty(self) -> None:
         self.tree.setUpdatesEnabled(False)
         try:
+            self._reset_tree_index()
             self.tree.clear()
             root = QtWidgets.QTreeWidgetItem(["Nessun progetto aperto"])
             self.tree.addTopLevelItem(root)
             root.setExpanded(True)
         finally:
             self.tree.setUpdatesEnabled(True)
-            
-    def _find_sheet_tree_item(self, page_id: str, sheet_idx0: int) -> Optional[QtWidgets.QTreeWidgetItem]:
-        def walk(node: QtWidgets.QTreeWidgetItem) -> Optional[QtWidgets.QTreeWidgetItem]:
-            kind = node.data(0, ROLE_NODE_KIND)
-            if kind == "SHEET":
-                pid = str(node.data(0, ROLE_PAGE_ID) or "")
-                sidx = int(node.data(0, ROLE_SHEET_INDEX0) or 0)
-                if pid == str(page_id) and sidx == int(sheet_idx0):
-                    return node
-            for i in range(node.childCount()):
-                r = walk(node.child(i))
-                if r is not None:
-                    return r
-            return None
-
-        for i in range(self.tree.topLevelItemCount()):
-            r = walk(self.tree.topLevelItem(i))
-            if r is not None:
-                return r
-        return None
-
 
-    def _select_tree_sheet(self, page_id: str, sheet_idx0: int) -> None:
-        it = self._find_sheet_tree_item(page_id, sheet_idx0)
-        if it is None:
+    def _reset_tree_index(self) -> None:
+        # "pages_root" | "page:<id>" | "sheet:<page_id>/<idx0>" -> item; firme pagina per il diff
+        self._tree_index: Dict[str, QtWidgets.QTreeWidgetItem] = {}
+        self._tree_page_sig: Dict[str, tuple] = {}
+        # page_id -> (page_name, sheets): fogli non ancora materializzati (creati alla prima espansione)
+        self._tree_pending: Dict[str, tuple] = {}
+        self._tree_root: Optional[Path] = None
+
+    def _make_page_item(self, page_id: str, page_name: str, label: str, sheets: tuple) -> QtWidgets.QTreeWidgetItem:
+        pt = QtWidgets.QTreeWidgetItem([label])
+        pt.setData(0, ROLE_NODE_KIND, "PAGE")
+        pt.setData(0, ROLE_PAGE_ID, page_id)
+        pt.setData(0, ROLE_PAGE_NAME, page_name)
+        self._tree_index[f"page:{page_id}"] = pt
+        if sheets:
+            # figli rimandati: freccia visibile subito, item foglio creati in _ensure_page_children
+            pt.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.ShowIndicator)
+            self._tree_pending[page_id] = (page_name, sheets)
+        return pt
+
+    def _ensure_page_children(self, pt: QtWidgets.QTreeWidgetItem) -> None:
+        page_id = str(pt.data(0, ROLE_PAGE_ID) or "")
+        pend = self._tree_pending.pop(page_id, None)
+        if pend is None:
             return
-
-        # espandi i parent per renderlo visibile
-        p = it.parent()
-        while p is not None:
-            p.setExpanded(True)
-            p = p.parent()
-
-        # seleziona senza “clic” utente
-        self.tree.setCurrentItem(it)
-        self.tree.scrollToItem(it, QtWidgets.QAbstractItemView.PositionAtCenter)
-
+        page_name, sheets = pend
+        single = len(sheets) == 1
+        children = [self._make_sheet_item(page_id, page_name, sh, single, idx) for idx, sh in enumerate(sheets)]
+        pt.addChildren(children)
+        pt.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.DontShowIndicatorWhenChildless)
+
+        index = self._tree_index
+        for idx, ch in enumerate(children):
+            index[f"sheet:{page_id}/{idx}"] = ch
+
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem)
+    def _on_tree_item_expanded(self, item: QtWidgets.QTreeWidgetItem) -> None:
+        if item.data(0, ROLE_NODE_KIND) == "PAGE":
+            self._ensure_page_children(item)
+
+    def _drop_page_index(self, page_id: str) -> None:
+        index = self._tree_index
+        pt = index.pop(f"page:{page_id}", None)
+        self._tree_page_sig.pop(page_id, None)
+        self._tree_pending.pop(page_id, None)
+        if pt is not None:
+            for idx in range(pt.childCount()):
+                index.pop(f"sheet:{page_id}/{idx}", None)
 
     def populate_tree_from_project(self) -> None:
         self.tree.setUpdatesEnabled(False)
@@ -387,57 +428,89 @@ class MainWindow(QtWidgets.QMainWindow):
             if not self.project:
                 # NON chiamare populate_tree_empty() qui per evitare doppi wrapper,
                 # ricostruisci direttamente il placeholder
+                self._reset_tree_index()
                 self.tree.clear()
                 root = QtWidgets.QTreeWidgetItem(["Nessun progetto aperto"])
                 self.tree.addTopLevelItem(root)
                 root.setExpanded(True)
                 return
 
+            specs = self.project.page_tree_specs()
+
+            # stesso progetto già in albero (add/delete pagina): patch solo delle pagine cambiate
+            root_pages = self._tree_index.get("pages_root")
+            if root_pages is not None and self._tree_root == self.project.root:
+                root_pages.parent().setText(0, self.project.name)
+                self._patch_tree_pages(root_pages, specs)
+                return
+
+            self._reset_tree_index()
+            self._tree_root = self.project.root
             self.tree.clear()
+            # sottoalbero costruito staccato dalla view: nessun insertRows per singolo item,
+            # un solo addTopLevelItem alla fine
             root_proj = QtWidgets.QTreeWidgetItem([self.project.name])
-            self.tree.addTopLevelItem(root_proj)
 
             root_vars = QtWidgets.QTreeWidgetItem(["Variabili"])
             root_pages = QtWidgets.QTreeWidgetItem(["Pagine"])
             root_bus = QtWidgets.QTreeWidgetItem(["Bus"])
-            root_proj.addChild(root_vars)
-            root_proj.addChild(root_pages)
-            root_proj.addChild(root_bus)
+            root_proj.addChildren([root_vars, root_pages, root_bus])
 
             root_pages.setData(0, ROLE_NODE_KIND, "PAGES_ROOT")
+            self._tree_index["pages_root"] = root_pages
 
-            init = self.project.pages_json.get("init")
-            if init:
-                init_id = str(init.get("id", "INIT"))
-                init_name = str(init.get("name", "Init"))
-                it = QtWidgets.QTreeWidgetItem([f"Init ({init_name})"])
-                it.setData(0, ROLE_NODE_KIND, "PAGE")
-                it.setData(0, ROLE_PAGE_ID, init_id)
-                it.setData(0, ROLE_PAGE_NAME, init_name)
-                root_pages.addChild(it)
-                sheets = init.get("sheets", [])
-                single = len(sheets) == 1
-                for idx, sh in enumerate(sheets):
-                    self._add_sheet_item(it, init_id, init_name, sh, single, idx)
-
-            for p in self.project.pages_json.get("pages", []):
-                page_id = str(p.get("id", "P???"))
-                page_name = str(p.get("name", page_id))
-                pt = QtWidgets.QTreeWidgetItem([f"{page_id} ({page_name})"])
-                pt.setData(0, ROLE_NODE_KIND, "PAGE")
-                pt.setData(0, ROLE_PAGE_ID, page_id)
-                pt.setData(0, ROLE_PAGE_NAME, page_name)
-                root_pages.addChild(pt)
-                sheets = p.get("sheets", [])
-                single = len(sheets) == 1
-                for idx, sh in enumerate(sheets):
-                    self._add_sheet_item(pt, page_id, page_name, sh, single, idx)
+            page_items: list[QtWidgets.QTreeWidgetItem] = []
+            for page_id, page_name, label, sheets in specs:
+                page_items.append(self._make_page_item(page_id, page_name, label, sheets))
+                self._tree_page_sig[page_id] = self._page_sig(label, sheets)
 
+            root_pages.addChildren(page_items)
+            self.tree.addTopLevelItem(root_proj)
+
+            # setExpanded ha effetto solo su item già nella view
             root_proj.setExpanded(True)
             root_pages.setExpanded(True)
 
         finally:
             self.tree.setUpdatesEnabled(True)
+
+    @staticmethod
+    def _page_sig(label: str, sheets: tuple) -> tuple:
+        return (label, sheets)
+
+    def _patch_tree_pages(self, root_pages: QtWidgets.QTreeWidgetItem, specs: list) -> None:
+        """Riallinea i figli di 'Pagine' a specs: item invariati restano (con il loro stato espanso)."""
+        sigs = self._tree_page_sig
+        index = self._tree_index
+
+        wanted: list[QtWidgets.QTreeWidgetItem] = []
+        wanted_ids: set[str] = set()
+        for page_id, page_name, label, sheets in specs:
+            sig = self._page_sig(label, sheets)
+            it = index.get(f"page:{page_id}")
+            if it is None or sigs.get(page_id) != sig:
+                if it is not None:
+                    self._drop_page_index(page_id)
+                it = self._make_page_item(page_id, page_name, label, sheets)
+                sigs[page_id] = sig
+            wanted.append(it)
+            wanted_ids.add(page_id)
+
+        for key in [k for k in index if k.startswith("page:") and k[5:] not in wanted_ids]:
+            self._drop_page_index(key[5:])
+
+        # via i figli non più voluti (o sostituiti), poi inserimenti solo dove l'ordine differisce
+        keep = {id(it) for it in wanted}
+        for i in range(root_pages.childCount() - 1, -1, -1):
+            if id(root_pages.child(i)) not in keep:
+                root_pages.takeChild(i)
+        for i, it in enumerate(wanted):
+            if i < root_pages.childCount() and root_pages.child(i) is it:
+                continue
+            if it.parent() is root_pages:
+                root_pages.removeChild(it)
+            root_pages.insertChild(i, it)
+
     def _human_tab_title(self, page_name: str, sheet_name: str, single_sheet: bool) -> str:
         # Se la pagina ha 1 solo foglio "Foglio1", mostro solo il nome pagina
         if single_sheet and sheet_name.strip().lower().startswith("foglio"):
@@ -446,30 +519,27 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
 
-    def _add_sheet_item(
+    def _make_sheet_item(
         self,
-        parent: QtWidgets.QTreeWidgetItem,
         page_id: str,
         page_name: str,
-        sh: dict,
+        sh: tuple,
         single_sheet: bool,
         sheet_index_0: int = 0,
-    ) -> None:
-        sheet_id = str(sh.get("id", ""))
-        sheet_name = str(sh.get("name", sheet_id or "Foglio"))
-        label = f"{sheet_id} - {sheet_name}" if sheet_id else sheet_name
+    ) -> QtWidgets.QTreeWidgetItem:
+        # sh = (sheet_id, sheet_name, label, file_rel) da Project.page_tree_specs
+        _sheet_id, sheet_name, label, file_rel = sh
         child = QtWidgets.QTreeWidgetItem([label])
 
-        file_rel = sh.get("file")
         if file_rel:
-            child.setData(0, ROLE_FILE, str(file_rel))
+            child.setData(0, ROLE_FILE, file_rel)
             child.setData(0, ROLE_TITLE, self._human_tab_title(page_name, sheet_name, single_sheet))
             child.setData(0, ROLE_PAGE_ID, page_id)
             child.setData(0, ROLE_PAGE_NAME, page_name)
             child.setData(0, ROLE_SHEET_INDEX0, int(sheet_index_0))
             child.setData(0, ROLE_NODE_KIND, "SHEET")
 
-        parent.addChild(child)
+        return child
 
 
     # ----------------
@@ -500,29 +570,15 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.sheetbar.blockSignals(False)
             return
 
-        sheets: list[Dict[str, Any]] = []
-        if page_id == "INIT":
-            init = self.project.pages_json.get("init") or {}
-            sheets = list(init.get("sheets", []))
-        else:
-            for p in self.project.pages_json.get("pages", []):
-                if str(p.get("id")) == page_id:
-                    sheets = list(p.get("sheets", []))
-                    break
+        labels = self._sheetbar_labels(page_id, page_name)
 
         self._sheetbar_files = []
         self.sheetbar.blockSignals(True)
         self._sheetbar_clear_tabs()
 
-        for i, sh in enumerate(sheets):
-            file_rel = sh.get("file")
-            if not file_rel:
-                continue
-            fp = (self.project.root / str(file_rel)).resolve()
+        for text, tip, fp in labels:
             self._sheetbar_files.append(fp)
-            self.sheetbar.addTab(str(i + 1))
-            sheet_name = str(sh.get("name", f"Foglio{i+1}"))
-            self.sheetbar.setTabToolTip(i, f"{page_name} — {sheet_name}")
+            self.sheetbar.setTabToolTip(self.sheetbar.addTab(text), tip)
 
         if self.sheetbar.count() == 0:
             self.sheetbar.setEnabled(False)
@@ -534,28 +590,41 @@ class MainWindow(QtWidgets.QMainWindow):
         self._sheetbar_page_id = page_id
         self._sheetbar_page_name = page_name
 
+    def _sheetbar_labels(self, page_id: str, page_name: str) -> list[Tuple[str, str, Path]]:
+        """Tab/tooltip/file dei fogli della pagina, calcolati una volta per entry."""
+        assert self.project is not None
+        entry = self.project.page_entry(page_id)
+        c = self._sheetbar_cache.get(page_id)
+        if c is not None and c[0] is entry and c[1] == page_name:
+            return c[2]
+
+        labels: list[Tuple[str, str, Path]] = []
+        for i, sh in enumerate(entry.get("sheets", []) if entry is not None else []):
+            file_rel = sh.get("file")
+            if not file_rel:
+                continue
+            fp = (self.project.root / str(file_rel)).resolve()
+            sheet_name = str(sh.get("name", f"Foglio{i+1}"))
+            labels.append((str(i + 1), f"{page_name} — {sheet_name}", fp))
+        self._sheetbar_cache[page_id] = (entry, page_name, labels)
+        return labels
+
     # ----------------
     # Page tabs
     # ----------------
     def _page_sheets(self, page_id: str) -> list[Dict[str, Any]]:
         assert self.project is not None
-        if page_id == "INIT":
-            init = self.project.pages_json.get("init") or {}
-            return list(init.get("sheets", []))
-        for p in self.project.pages_json.get("pages", []):
-            if str(p.get("id")) == page_id:
-                return list(p.get("sheets", []))
-        return []
+        entry = self.project.page_entry(page_id)
+        if entry is None:
+            return []
+        return list(entry.get("sheets", []))
 
     def _page_name(self, page_id: str) -> str:
         assert self.project is not None
-        if page_id == "INIT":
-            init = self.project.pages_json.get("init") or {}
-            return str(init.get("name", "Init"))
-        for p in self.project.pages_json.get("pages", []):
-            if str(p.get("id")) == page_id:
-                return str(p.get("name", page_id))
-        return page_id
+        entry = self.project.page_entry(page_id)
+        if entry is None:
+            return page_id
+        return str(entry.get("name", "Init" if page_id == "INIT" else page_id))
 
     def _open_page_tab(self, page_id: str) -> PageEditorTab:
         assert self.project is not None
@@ -591,6 +660,7 @@ class MainWindow(QtWidgets.QMainWindow):
     # ----------------
     # Context menu
     # ----------------
+    @QtCore.Slot(QtCore.QPoint)
     def on_tree_context_menu(self, pos: QtCore.QPoint) -> None:
         if not self.project:
             return
@@ -635,6 +705,7 @@ class MainWindow(QtWidgets.QMainWindow):
     # ----------------
     # Tree click
     # ----------------
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem, int)
     def on_tree_clicked(self, item: QtWidgets.QTreeWidgetItem, col: int) -> None:
         if not self.project:
             return
@@ -667,33 +738,21 @@ class MainWindow(QtWidgets.QMainWindow):
             return
         try:
             self._sync_tree_guard = True
-            root = self.tree.invisibleRootItem()
-            for i in range(root.childCount()):
-                proj = root.child(i)
-                if not proj:
-                    continue
-                for j in range(proj.childCount()):
-                    node = proj.child(j)
-                    if not node or node.text(0) != "Pagine":
-                        continue
-                    for k in range(node.childCount()):
-                        page_item = node.child(k)
-                        if not page_item:
-                            continue
-                        if str(page_item.data(0, ROLE_PAGE_ID) or "") != page_id:
-                            continue
-                        page_item.setExpanded(True)
-                        if 0 <= sheet_idx0 < page_item.childCount():
-                            self.tree.setCurrentItem(page_item.child(sheet_idx0))
-                        else:
-                            self.tree.setCurrentItem(page_item)
-                        return
+            # lookup diretto nell'indice albero, niente scansione progetto -> Pagine -> pagine
+            page_item = self._tree_index.get(f"page:{page_id}")
+            if page_item is None:
+                return
+            self._ensure_page_children(page_item)
+            page_item.setExpanded(True)
+            sheet_item = self._tree_index.get(f"sheet:{page_id}/{int(sheet_idx0)}")
+            self.tree.setCurrentItem(sheet_item if sheet_item is not None else page_item)
         finally:
             self._sync_tree_guard = False
 
     # ----------------
     # Top tab close/change
     # ----------------
+    @QtCore.Slot(int)
     def on_close_top_tab(self, idx: int) -> None:
         w = self.tabs.widget(idx)
         tab = self._page_tab_from_widget(w)
@@ -719,36 +778,23 @@ class MainWindow(QtWidgets.QMainWindow):
         self._close_page_tab(tab.page_id)
         self.on_top_tab_changed(self.tabs.currentIndex())
 
+    @QtCore.Slot(int)
     def on_top_tab_changed(self, idx: int) -> None:
         if not hasattr(self, "tabs"):
             return
 
         w = self.tabs.widget(idx)
 
-        # Se è una pagina editor con file_path → aggiorna sheetbar
-        if w is not None and hasattr(w, "file_path"):
-            try:
-                page_id, page_name, sheet_idx0 = self.infer_page_from_file(w.file_path)
-                if page_id and page_name and hasattr(self, "set_sheetbar_page"):
-                   self.set_sheetbar_page(page_id, page_name, sheet_idx0)
-            except Exception:
-                pass
-        return
-
-        # Se sei su Settings/Output: NON disabilitare la sheetbar.
-        # Deve restare cliccabile per cambiare foglio mentre leggi l'output.
-        if w in (self.tab_settings, self.tab_output):
-            return
-
-        # Altri widget non-editor: non tocchiamo la sheetbar (la lasciamo come sta)
-        return
-
-
+        # Se è una pagina editor → aggiorna sheetbar con le info già nel tab.
+        # Settings/Output e altri widget: la sheetbar resta com'è (cliccabile).
+        if isinstance(w, PageEditorTab) and self.project:
+            self.set_sheetbar_page(w.page_id, w.page_name, w.current_sheet_index0)
 
 
     # ----------------
     # Sheetbar change
     # ----------------
+    @QtCore.Slot(int)
     def on_sheetbar_changed(self, idx: int) -> None:
         if not self.project:
             return
@@ -765,15 +811,22 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Chiedi al PageEditorTab di mostrare il foglio idx
         # (usiamo fallback per non “indovinare” un solo nome)
-        for meth in ("set_sheet_index", "select_sheet", "open_sheet", "show_sheet", "set_current_sheet"):
-            if hasattr(tab, meth):
-                getattr(tab, meth)(idx)
-                self._select_tree_sheet(str(page_id), int(idx))
-                return
-
+        name = MainWindow._SHEET_SETTER_NAME
+        if name is None:
+            name = next(
+                (m for m in ("set_sheet_index", "select_sheet", "open_sheet", "show_sheet", "set_current_sheet")
+                 if hasattr(tab, m)),
+                "",
+            )
+            MainWindow._SHEET_SETTER_NAME = name
+            if not name:
+                # PageEditorTab non espone ancora un metodo per cambiare foglio
+                self.log("SHEETBAR: PageEditorTab non ha un metodo per cambiare foglio (serve set_sheet_index).")
+        if not name:
+            return
 
-        # Se arrivi qui: PageEditorTab non espone ancora un metodo per cambiare foglio
-        self.log("SHEETBAR: PageEditorTab non ha un metodo per cambiare foglio (serve set_sheet_index).")
+        getattr(tab, name)(idx)
+        self._select_tree_sheet(str(page_id), int(idx))
 
     # ----------------
     # Persistence: dirs
@@ -811,7 +864,7 @@ class MainWindow(QtWidgets.QMainWindow):
     # ----------------
     def _open_project_path(self, folder: Path) -> None:
         self.project = load_project(folder)
-        ensure_connections_file(self.project.root)
+        self._sheetbar_cache.clear()
         self.settings.set_project(self.project.root)
         self.setWindowTitle(f"{APP_NAME} — {self.project.name}")
         self.populate_tree_from_project()
@@ -847,6 +900,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self._close_page_tab(page_id)
 
         self.project = None
+        self._sheetbar_cache.clear()
         self.setWindowTitle(APP_NAME)
         self.populate_tree_empty()
         self.clear_sheetbar()
@@ -871,13 +925,34 @@ class MainWindow(QtWidgets.QMainWindow):
                 return
 
         out_dir = base / name
-        try:
+
+        def _create() -> None:
             ensure_dir(base)
             create_project_skeleton(out_dir, name)
-            self.set_last_base_dir(base)
-            self._open_project_path(out_dir)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Errore", str(e))
+
+        # scrittura skeleton su threadpool; il dialog compare solo se dura oltre 300 ms
+        prog = QtWidgets.QProgressDialog(self)
+        prog.setWindowTitle("Nuovo progetto")
+        prog.setLabelText(f"Creazione progetto {name}…")
+        prog.setCancelButton(None)
+        prog.setRange(0, 0)
+        prog.setWindowModality(QtCore.Qt.ApplicationModal)
+        prog.setMinimumDuration(300)
+        prog.setValue(0)
+
+        def _done(_res: Any) -> None:
+            prog.close()
+            try:
+                self.set_last_base_dir(base)
+                self._open_project_path(out_dir)
+            except Exception as e:
+                QtWidgets.QMessageBox.critical(self, "Errore", str(e))
+
+        def _err(msg: str) -> None:
+            prog.close()
+            QtWidgets.QMessageBox.critical(self, "Errore", msg)
+
+        self._new_project_job = run_job(_create, on_ok=_done, on_err=_err)
 
     def open_project(self) -> None:
         base = self.get_last_project_dir()
@@ -1082,12 +1157,17 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
     def _force_offline_ui(self) -> None:
-        self.lbl_status.setText("OFFLINE")
-        self.lbl_status.setStyleSheet("color:#777; font-weight:600;")
+        self._set_status_label("OFFLINE", False)
+
+    def _on_profiles_loading(self, loading: bool) -> None:
+        # Connetti solo col profilo del progetto già applicato
+        self.act_connect.setEnabled(not loading and not self._ping_inflight)
 
     def connect_runtime_once(self) -> None:
         if not self.project:
             return
+        if self.settings.is_loading():
+            return
         if getattr(self, "_ping_inflight", False):
             return
 
@@ -1096,19 +1176,19 @@ class MainWindow(QtWidgets.QMainWindow):
 
         def _err(msg: str) -> None:
             self._ping_inflight = False
-            self.act_connect.setEnabled(True)
+            self.act_connect.setEnabled(not self.settings.is_loading())
             self._connected = False
             self._set_connect_action_text()
             self.timer.stop()
             self._force_offline_ui()
             self.log(f"CONNECT: ERROR — {msg}")
 
-        self.client.ping_async(self._on_connect_ping_result, _err)
+        self._ping_job = self.client.ping_async(self._on_connect_ping_result, _err)
 
 
     def _on_connect_ping_result(self, result) -> None:
         self._ping_inflight = False
-        self.act_connect.setEnabled(True)
+        self.act_connect.setEnabled(not self.settings.is_loading())
 
         try:
             online, st = result
@@ -1118,9 +1198,8 @@ class MainWindow(QtWidgets.QMainWindow):
         if online:
             self._connected = True
             self._set_connect_action_text()
-            self.timer.start()
-            self.lbl_status.setText(f"ONLINE — {st}")
-            self.lbl_status.setStyleSheet("color:#0a0; font-weight:600;")
+            self._start_status_stream()
+            self._set_status_label(f"ONLINE — {st}", True)
             self.log("CONNECT: OK")
         else:
             self._connected = False
@@ -1130,11 +1209,23 @@ class MainWindow(QtWidgets.QMainWindow):
             self.log("CONNECT: OFFLINE")
 
 
+    def _on_about_to_quit(self) -> None:
+        self.timer.stop()
+        self.client.stop_status_stream()
+        self.client.close()
+        _clear_client_cache()
+
+
     def disconnect_runtime(self, reason: str = "") -> None:
         """Disconnessione logica: stop ping e OFFLINE."""
         self._connected = False
         self._set_connect_action_text()
         self.timer.stop()
+        self.client.stop_status_stream()
+        # socket persistente del client: chiuso in background (il lock può attendere un ping in volo)
+        self._close_job = run_job(self.client.close)
+        # anche i client di compile/send parcheggiati nel pool
+        _clear_client_cache()
         self._force_offline_ui()
         if reason:
             self.log(f"DISCONNECT: {reason}")
@@ -1142,6 +1233,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.log("DISCONNECT")
 
 
+    @QtCore.Slot()
     def toggle_connect(self) -> None:
         """Toolbar: Connetti <-> Disconnetti."""
         if not self.project:
@@ -1155,11 +1247,36 @@ class MainWindow(QtWidgets.QMainWindow):
     # ----------------
     def on_profile_changed(self, p: RuntimeProfile) -> None:
         self.client.set_profile(p)
+        # i client in pool puntano al vecchio host/porta
+        _clear_client_cache()
         if self.project and self._connected:
-            self.refresh_status()
+            # stream sul nuovo host/porta (se non risponde -> lost -> OFFLINE)
+            self.timer.stop()
+            self._start_status_stream()
+
+    def _start_status_stream(self) -> None:
+        """Stato runtime in push; il QTimer di ping resta solo come fallback."""
+        self.client.start_status_stream(self._on_stream_status, self._on_stream_lost, STATUS_POLL_MS)
+
+    def _on_stream_status(self, st: str) -> None:
+        if not self._connected:
+            return
+        self._set_status_label(f"ONLINE — {st}", True)
+
+    def _on_stream_lost(self, why: str) -> None:
+        if not self._connected:
+            return
+        if why == "unsupported":
+            # runtime senza SUBSCRIBE_STATUS: ping periodico come prima
+            self.log("STATUS: runtime senza SUBSCRIBE_STATUS, uso ping periodico")
+            self._ok_streak = 0
+            self.timer.start(STATUS_POLL_MS)
+            return
+        self.disconnect_runtime("lost")
 
 
 
+    @QtCore.Slot()
     def refresh_status(self) -> None:
         if not self.project or not self._connected:
             self._force_offline_ui()
@@ -1175,7 +1292,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self._ping_inflight = False
             self.disconnect_runtime("lost")
 
-        self.client.ping_async(self._on_timer_ping_result, _err)
+        self._ping_job = self.client.ping_async(self._on_timer_ping_result, _err)
 
 
     def _on_timer_ping_result(self, result) -> None:
@@ -1187,9 +1304,14 @@ class MainWindow(QtWidgets.QMainWindow):
             online, st = False, "OFFLINE"
 
         if online:
-            self.lbl_status.setText(f"ONLINE — {st}")
-            self.lbl_status.setStyleSheet("color:#0a0; font-weight:600;")
+            self._set_status_label(f"ONLINE — {st}", True)
+            # runtime stabile: ping sempre più radi (il job in corso non si sovrappone)
+            self._ok_streak += 1
+            interval = min(STATUS_POLL_MS << min(self._ok_streak, STATUS_POLL_MAX_SHIFT), STATUS_POLL_MAX_MS)
+            if self.timer.interval() != interval:
+                self.timer.setInterval(interval)
         else:
+            self._ok_streak = 0
             self.disconnect_runtime("lost")
 
 
@@ -1213,6 +1335,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.diag.setUpdatesEnabled(False)
         try:
             self.diag.clear()
+            items: list[QtWidgets.QTreeWidgetItem] = []
             for d in diags or []:
                 sev = str(d.get("sev", "") or "")
                 f = str(d.get("file", "") or "")
@@ -1221,7 +1344,9 @@ class MainWindow(QtWidgets.QMainWindow):
                 it = QtWidgets.QTreeWidgetItem([sev, f, str(ln) if ln else "", msg])
                 it.setData(0, QtCore.Qt.UserRole, f)          # file rel
                 it.setData(0, QtCore.Qt.UserRole + 1, ln)     # line
-                self.diag.addTopLevelItem(it)
+                items.append(it)
+            # un solo inserimento nel model invece di uno per riga
+            self.diag.addTopLevelItems(items)
             self.diag.resizeColumnToContents(0)
             self.diag.resizeColumnToContents(2)
         finally:
@@ -1266,6 +1391,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         return "", "", 0
 
+    @QtCore.Slot(QtWidgets.QTreeWidgetItem, int)
     def on_diag_double_clicked(self, item: QtWidgets.QTreeWidgetItem, _col: int) -> None:
         if not self.project:
             return
@@ -1,14 +1,17 @@
 # parte 5/9 — ide/project_model.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+import sys
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 from ide.utils import (
     default_project_json,
     ensure_dir,
     folder_effectively_empty,
+    json_bytes,
     load_json,
     make_fbd_placeholder,
     next_page_id,
@@ -19,7 +22,44 @@ from ide.utils import (
 )
 
 
-@dataclass
+# (sheet_id, sheet_name, label, file_rel)
+SheetSpec = Tuple[str, str, str, Optional[str]]
+# (page_id, page_name, label, sheets)
+PageSpec = Tuple[str, str, str, Tuple[SheetSpec, ...]]
+
+
+def build_page_tree_specs(pages_json: Dict[str, Any]) -> List[PageSpec]:
+    """Etichette albero già formattate, in ordine: Init prima delle pagine."""
+
+    intern = sys.intern
+
+    def sheets_of(page: Dict[str, Any]) -> Tuple[SheetSpec, ...]:
+        out = []
+        append = out.append
+        for sh in page.get("sheets", []):
+            get = sh.get
+            # "S001"/"Foglio1" si ripetono in ogni pagina: una sola copia condivisa
+            sheet_id = intern(str(get("id", "")))
+            sheet_name = intern(str(get("name", sheet_id or "Foglio")))
+            label = f"{sheet_id} - {sheet_name}" if sheet_id else sheet_name
+            file_rel = get("file")
+            append((sheet_id, sheet_name, label, str(file_rel) if file_rel else None))
+        return tuple(out)
+
+    specs: List[PageSpec] = []
+    init = pages_json.get("init")
+    if init:
+        init_id = str(init.get("id", "INIT"))
+        init_name = str(init.get("name", "Init"))
+        specs.append((init_id, init_name, f"Init ({init_name})", sheets_of(init)))
+    for p in pages_json.get("pages", []):
+        page_id = str(p.get("id", "P???"))
+        page_name = str(p.get("name", page_id))
+        specs.append((page_id, page_name, f"{page_id} ({page_name})", sheets_of(p)))
+    return specs
+
+
+@dataclass(slots=True)
 class Project:
     root: Path
     name: str
@@ -27,6 +67,29 @@ class Project:
     pages_json: Dict[str, Any]
     vars_json: Dict[str, Any]
     monitors_json: Dict[str, Any]
+    # (pages_json da cui sono state calcolate, specs): valide finché pages_json è lo stesso oggetto
+    _tree_specs: Optional[Tuple[Dict[str, Any], List[PageSpec]]] = field(default=None, repr=False, compare=False)
+    # (pages_json, page_id -> entry pagina): stessa invalidazione per identità di _tree_specs
+    _pages_by_id: Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def page_tree_specs(self) -> List[PageSpec]:
+        c = self._tree_specs
+        if c is None or c[0] is not self.pages_json:
+            c = self._tree_specs = (self.pages_json, build_page_tree_specs(self.pages_json))
+        return c[1]
+
+    def page_entry(self, page_id: str) -> Optional[Dict[str, Any]]:
+        """Entry di pages.json per id ("INIT" -> blocco init); None se assente."""
+        c = self._pages_by_id
+        if c is None or c[0] is not self.pages_json:
+            by_id: Dict[str, Dict[str, Any]] = {}
+            for p in self.pages_json.get("pages", []):
+                by_id.setdefault(str(p.get("id")), p)  # id duplicato: vince il primo, come la scansione lineare
+            by_id["INIT"] = self.pages_json.get("init") or {}
+            c = self._pages_by_id = (self.pages_json, by_id)
+        return c[1].get(page_id)
 
 
 def load_project(folder: Path) -> Project:
@@ -35,7 +98,9 @@ def load_project(folder: Path) -> Project:
     varsj = load_json(folder / "vars.json")
     mon = load_json(folder / "monitors.json")
     name = str(pj.get("name", folder.name))
-    return Project(root=folder, name=name, project_json=pj, pages_json=pages, vars_json=varsj, monitors_json=mon)
+    project = Project(root=folder, name=name, project_json=pj, pages_json=pages, vars_json=varsj, monitors_json=mon)
+    project.page_tree_specs()  # etichette albero calcolate una volta al load
+    return project
 
 
 def create_project_skeleton(out_dir: Path, name: str) -> None:
@@ -45,9 +110,16 @@ def create_project_skeleton(out_dir: Path, name: str) -> None:
     if out_dir.exists() and not folder_effectively_empty(out_dir):
         raise RuntimeError(f"Cartella non vuota: {out_dir}")
 
-    ensure_dir(out_dir)
-    ensure_dir(out_dir / "pages")
-    ensure_dir(out_dir / "data")
+    # percorsi come str una volta sola: os.path.join al posto di Path.__truediv__
+    out_s = str(out_dir)
+    join = os.path.join
+    pages_dir = join(out_s, "pages")
+    init_dir = join(pages_dir, "INIT")
+    p001_dir = join(pages_dir, "P001")
+    p002_dir = join(pages_dir, "P002")
+    # solo le cartelle foglia: makedirs crea out_dir e pages/ al primo giro
+    for d in (init_dir, p001_dir, p002_dir, join(out_s, "data")):
+        os.makedirs(d, exist_ok=True)
 
     project = default_project_json(name)
 
@@ -102,33 +174,30 @@ def create_project_skeleton(out_dir: Path, name: str) -> None:
 
     monitors_json = {"schema_version": 1, "presets": []}
 
-    write_json(out_dir / "project.json", project)
-    write_json(out_dir / "pages.json", pages)
-    write_json(out_dir / "vars.json", vars_json)
-    write_json(out_dir / "monitors.json", monitors_json)
-
-    init_dir = out_dir / "pages" / "INIT"
-    p001_dir = out_dir / "pages" / "P001"
-    p002_dir = out_dir / "pages" / "P002"
-    ensure_dir(init_dir)
-    ensure_dir(p001_dir)
-    ensure_dir(p002_dir)
-
-    (init_dir / "S001.st").write_text(st_sheet_template("INIT_S001", "Init"), encoding="utf-8")
-
-    (p001_dir / "S001.st").write_text(st_sheet_template("P001_S001", "Main"), encoding="utf-8")
-    (p001_dir / "S002.st").write_text(st_sheet_template("P001_S002", "Main"), encoding="utf-8")
-
-    (p002_dir / "S001.st").write_text(st_sheet_template("P002_S001", "Dichiarazioni Utente"), encoding="utf-8")
-    (p002_dir / "S002.st").write_text(st_sheet_template("P002_S002", "Risultato Elaborazione IA"), encoding="utf-8")
-
-    (out_dir / "pages" / "INIT.st").write_text(st_wrapper_template("INIT", ["INIT_S001"]), encoding="utf-8")
-    (out_dir / "pages" / "P001.st").write_text(
-        st_wrapper_template("P001", ["P001_S001", "P001_S002"]), encoding="utf-8"
+    json_files = (
+        (join(out_s, "project.json"), json_bytes(project)),
+        (join(out_s, "pages.json"), json_bytes(pages)),
+        (join(out_s, "vars.json"), json_bytes(vars_json)),
+        (join(out_s, "monitors.json"), json_bytes(monitors_json)),
     )
-    (out_dir / "pages" / "P002.st").write_text(
-        st_wrapper_template("P002", ["P002_S001", "P002_S002"]), encoding="utf-8"
+    for path, data in json_files:
+        with open(path, "wb") as f:
+            f.write(data)
+
+    st_files = (
+        (join(init_dir, "S001.st"), st_sheet_template("INIT_S001", "Init")),
+        (join(p001_dir, "S001.st"), st_sheet_template("P001_S001", "Main")),
+        (join(p001_dir, "S002.st"), st_sheet_template("P001_S002", "Main")),
+        (join(p002_dir, "S001.st"), st_sheet_template("P002_S001", "Dichiarazioni Utente")),
+        (join(p002_dir, "S002.st"), st_sheet_template("P002_S002", "Risultato Elaborazione IA")),
+        (join(pages_dir, "INIT.st"), st_wrapper_template("INIT", ["INIT_S001"])),
+        (join(pages_dir, "P001.st"), st_wrapper_template("P001", ["P001_S001", "P001_S002"])),
+        (join(pages_dir, "P002.st"), st_wrapper_template("P002", ["P002_S001", "P002_S002"])),
     )
+    # modo testo: i .st restano con i fine riga di piattaforma come prima
+    for path, txt in st_files:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(txt)
 
 
 def add_page_to_project(project: Project, page_name: str, language: str) -> str:
@@ -3,27 +3,206 @@ from __future__ import annotations
 import json
 import socket
 import struct
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PySide6 import QtCore, QtNetwork
+
 from ide.qt_jobs import run_job
 
+try:
+    import orjson
+except ImportError:  # fallback: stdlib json
+    orjson = None
+
+_HDR = struct.Struct("<I")
+# fallback senza orjson: encoder compatto costruito una volta (messaggi piccoli, senza cicli)
+_json_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), check_circular=False).encode
+
+# PING è sempre uguale: frame precalcolato (req_id fisso 0, il contatore parte da 2).
+# "reply":"text" -> i runtime che lo supportano rispondono b"OK|<runtime_state>" (niente JSON);
+# gli altri ignorano il campo e rispondono JSON come sempre.
+_PING_RAW = b'{"cmd":"PING","req_id":0,"payload":{"reply":"text"}}'
+_PING_TEXT_OK = b"OK|"
+_PING_HDR = _HDR.pack(len(_PING_RAW))
+
+
+class _PeerClosed(RuntimeError):
+    """Il runtime ha chiuso la connessione prima di rispondere."""
+
+
+# sendmsg (scatter-gather): header + body in una sola syscall senza concatenare (non su Windows)
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+
+
+def _recv_into_exact(s: socket.socket, view: memoryview) -> bool:
+    """Riempie tutta la view (False se la connessione chiude prima)."""
+    n = len(view)
+    got = 0
+    while got < n:
+        k = s.recv_into(view[got:], n - got)
+        if not k:
+            return False
+        got += k
+    return True
 
-@dataclass
+
+def _recv_exact(s: socket.socket, n: int) -> Optional[bytearray]:
+    """Legge esattamente n byte in un buffer preallocato (None se la connessione chiude prima)."""
+    buf = bytearray(n)
+    return buf if _recv_into_exact(s, memoryview(buf)) else None
+
+
+def _loads(raw) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    # json.loads accetta bytes/bytearray (UTF-8): niente copia bytes() né str intermedia
+    return json.loads(raw)
+
+
+@dataclass(slots=True, frozen=True)
 class RuntimeProfile:
+    # immutabile: condiviso senza copie tra GUI e job di ping/stream
     name: str
     host: str
     port: int
 
 
+class StatusStream(QtCore.QObject):
+    """Stato runtime in push (SUBSCRIBE_STATUS) su una QTcpSocket guidata dall'event loop.
+
+    Una sola connessione: niente connect/send/recv per tick. `lost` riceve il motivo;
+    "unsupported" se la sottoscrizione non arriva all'ack (ok=False, timeout o chiusura):
+    runtime senza SUBSCRIBE_STATUS, il chiamante passa al ping periodico.
+    """
+
+    status = QtCore.Signal(str)
+    lost = QtCore.Signal(str)
+
+    def __init__(self, host: str, port: int, interval_ms: int = 1000, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._interval_ms = int(interval_ms)
+        self._buf = bytearray()
+        self._acked = False
+        self._done = False
+
+        # watchdog: nessun frame per 3 intervalli -> runtime perso
+        self._watchdog = QtCore.QTimer(self)
+        self._watchdog.setSingleShot(True)
+        self._watchdog.setInterval(3 * self._interval_ms)
+        self._watchdog.timeout.connect(lambda: self._fail("timeout"))
+
+        self._sock = QtNetwork.QTcpSocket(self)
+        self._sock.connected.connect(self._on_connected)
+        self._sock.readyRead.connect(self._on_ready_read)
+        self._sock.errorOccurred.connect(lambda _e: self._fail(self._sock.errorString()))
+        self._sock.disconnected.connect(lambda: self._fail("connessione chiusa"))
+        self._sock.connectToHost(host, int(port))
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._done = True
+        self._watchdog.stop()
+        self._sock.abort()
+
+    def _fail(self, why: str) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._watchdog.stop()
+        self._sock.abort()
+        if not self._acked:
+            # runtime vecchio: ignora SUBSCRIBE_STATUS (watchdog) o chiude la connessione
+            why = "unsupported"
+        self.lost.emit(why)
+
+    def _on_connected(self) -> None:
+        self._sock.setSocketOption(QtNetwork.QAbstractSocket.LowDelayOption, 1)
+        msg = {"cmd": "SUBSCRIBE_STATUS", "req_id": 1, "payload": {"interval_ms": self._interval_ms}}
+        raw = orjson.dumps(msg) if orjson is not None else _json_compact(msg).encode("utf-8")
+        self._sock.write(_HDR.pack(len(raw)) + raw)
+
+    def _on_ready_read(self) -> None:
+        buf = self._buf
+        buf += self._sock.readAll().data()
+        off = 0
+        n = len(buf)
+        while n - off >= 4:
+            (ln,) = _HDR.unpack_from(buf, off)
+            if ln <= 0 or ln > 10_000_000:
+                self._fail(f"Lunghezza frame non valida: {ln}")
+                return
+            end = off + 4 + ln
+            if end > n:
+                break
+            try:
+                msg = _loads(buf[off + 4:end])
+            except ValueError as e:
+                self._fail(f"JSON non valido: {e}")
+                return
+            off = end
+            self._on_frame(msg)
+            if self._done:
+                return
+        del buf[:off]
+
+    def _on_frame(self, msg: Dict[str, Any]) -> None:
+        self._watchdog.start()
+        if msg.get("event") == "STATUS":
+            self.status.emit(str((msg.get("payload") or {}).get("runtime_state", "?")))
+            return
+        if not self._acked:
+            if not msg.get("ok", False):
+                self._fail("unsupported")
+                return
+            self._acked = True
+
+
 class RuntimeClient:
     """Client TCP framed JSON: <uint32 le length> + JSON UTF-8."""
 
     def __init__(self) -> None:
         self.profile = RuntimeProfile("RunTimeLocal", "127.0.0.1", 1963)
         self._req_id = 1
+        # socket persistente (riconnessione solo dopo errore); il lock serializza i job
+        self._sock: Optional[socket.socket] = None
+        self._sock_lock = threading.Lock()
+        self._stream: Optional[StatusStream] = None
+        # header di risposta: buffer fisso riusato a ogni frame (accesso sotto _sock_lock)
+        self._hdr = bytearray(4)
+        self._hdr_mv = memoryview(self._hdr)
 
     def set_profile(self, p: RuntimeProfile) -> None:
+        old = self.profile
         self.profile = p
+        if (old.host, old.port) != (p.host, p.port):
+            self.close()
+
+    def close(self) -> None:
+        with self._sock_lock:
+            self._drop_sock()
+
+    def _drop_sock(self) -> None:
+        s, self._sock = self._sock, None
+        if s is not None:
+            try:
+                # FIN immediato verso il runtime, poi rilascio del descrittore
+                s.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                s.close()
+            except OSError:
+                pass
+
+    def _connect(self, timeout_s: float) -> socket.socket:
+        s = socket.create_connection((self.profile.host, self.profile.port), timeout=timeout_s)
+        # messaggi piccoli request/response: niente Nagle
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self._sock = s
+        return s
 
     def _next_req_id(self) -> int:
         self._req_id += 1
@@ -33,31 +212,68 @@ class RuntimeClient:
 
     def _send_cmd(self, cmd: str, payload: Dict[str, Any], timeout_s: float = 1.2) -> Dict[str, Any]:
         msg = {"cmd": cmd, "req_id": self._next_req_id(), "payload": payload}
-        raw = json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-        framed = struct.pack("<I", len(raw)) + raw
+        if orjson is not None:
+            raw = orjson.dumps(msg)  # già compatto e UTF-8
+        else:
+            raw = _json_compact(msg).encode("utf-8")
+        return self._send_raw(raw, _HDR.pack(len(raw)), timeout_s)
 
-        with socket.create_connection((self.profile.host, self.profile.port), timeout=timeout_s) as s:
-            s.sendall(framed)
+    def _send_raw(self, raw: bytes, hdr: bytes, timeout_s: float) -> Dict[str, Any]:
+        return _loads(self._exchange(raw, hdr, timeout_s))
 
-            hdr = s.recv(4)
-            if len(hdr) != 4:
-                raise RuntimeError("Header incompleto")
-            (ln,) = struct.unpack("<I", hdr)
-            if ln <= 0 or ln > 10_000_000:
-                raise RuntimeError(f"Lunghezza risposta non valida: {ln}")
+    def _exchange(self, raw: bytes, hdr: bytes, timeout_s: float) -> bytearray:
+        """Frame in uscita -> corpo della risposta (bytes grezzi, non decodificati)."""
+        with self._sock_lock:
+            s = self._sock
+            if s is not None:
+                try:
+                    s.settimeout(timeout_s)
+                    data = self._roundtrip(s, raw, hdr)
+                except (ConnectionError, _PeerClosed):
+                    # socket riusato chiuso dal runtime (riavvio/idle): un solo nuovo tentativo
+                    self._drop_sock()
+                    s = None
+                except Exception:
+                    self._drop_sock()
+                    raise
+            if s is None:
+                try:
+                    data = self._roundtrip(self._connect(timeout_s), raw, hdr)
+                except Exception:
+                    self._drop_sock()
+                    raise
+        return data
+
+    def _roundtrip(self, s: socket.socket, raw: bytes, hdr: bytes) -> bytearray:
+        if _HAS_SENDMSG:
+            sent = s.sendmsg([hdr, raw])
+            if sent < len(hdr) + len(raw):
+                # invio parziale (raro): completo il resto
+                s.sendall(memoryview(hdr + raw)[sent:])
+        else:
+            # un'unica allocazione della dimensione esatta del frame
+            buf = bytearray(len(hdr) + len(raw))
+            buf[: len(hdr)] = hdr
+            buf[len(hdr) :] = raw
+            s.sendall(buf)
 
-            data = b""
-            while len(data) < ln:
-                chunk = s.recv(ln - len(data))
-                if not chunk:
-                    raise RuntimeError("Connessione chiusa")
-                data += chunk
+        if not _recv_into_exact(s, self._hdr_mv):
+            raise _PeerClosed("Header incompleto")
+        (ln,) = _HDR.unpack_from(self._hdr, 0)
+        if ln <= 0 or ln > 10_000_000:
+            raise RuntimeError(f"Lunghezza risposta non valida: {ln}")
 
-        return json.loads(data.decode("utf-8"))
+        data = _recv_exact(s, ln)
+        if data is None:
+            raise RuntimeError("Connessione chiusa")
+        return data
 
     def ping(self) -> Tuple[bool, str]:
         try:
-            r = self._send_cmd("PING", {})
+            data = self._exchange(_PING_RAW, _PING_HDR, 1.2)
+            if data.startswith(_PING_TEXT_OK):
+                return True, data[3:].decode("utf-8", "replace")
+            r = _loads(data)
             if not r.get("ok", False):
                 return False, "OFFLINE"
             st = (r.get("payload") or {}).get("runtime_state", "?")
@@ -72,6 +288,29 @@ class RuntimeClient:
         """Send project bundle to runtime (MVP)."""
         return self._send_cmd("LOAD_PROJECT", bundle_payload, timeout_s=3.0)
 
+    # ----------------
+    # Status push (solo thread GUI)
+    # ----------------
+    def start_status_stream(
+        self,
+        on_status: Callable[[str], None],
+        on_lost: Callable[[str], None],
+        interval_ms: int = 1000,
+    ) -> StatusStream:
+        """Sottoscrive gli STATUS push del profilo corrente (sostituisce lo stream precedente)."""
+        self.stop_status_stream()
+        st = StatusStream(self.profile.host, self.profile.port, interval_ms)
+        st.status.connect(on_status)
+        st.lost.connect(on_lost)
+        self._stream = st
+        return st
+
+    def stop_status_stream(self) -> None:
+        st, self._stream = self._stream, None
+        if st is not None:
+            st.stop()
+            st.deleteLater()
+
     # ----------------
     # Async helpers
     # ----------------
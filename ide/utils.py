@@ -2,12 +2,20 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, timezone
+import time
 from pathlib import Path
 from typing import Any, Dict
 
 from ide.config import SCHEMA_VERSION_PROJECT
 
+try:
+    import orjson
+except ImportError:  # fallback: stdlib json
+    orjson = None
+
+# opzioni orjson calcolate una volta: write_json gira a ogni salvataggio di pages/vars/monitors
+_ORJSON_WRITE_OPT = (orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE) if orjson is not None else 0
+
 
 def default_projects_dir() -> Path:
     candidates = [
@@ -37,7 +45,8 @@ def folder_effectively_empty(p: Path) -> bool:
 
 
 def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+    # stesso formato di datetime.now(timezone.utc).isoformat(timespec="seconds"), senza datetime
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
 
 
 def ensure_dir(p: Path) -> None:
@@ -45,11 +54,28 @@ def ensure_dir(p: Path) -> None:
 
 
 def load_json(p: Path) -> Dict[str, Any]:
-    return json.loads(p.read_text(encoding="utf-8"))
+    if orjson is not None:
+        return orjson.loads(p.read_bytes())
+    # anche senza orjson: json.loads parsa i bytes UTF-8, niente str intermedia
+    return json.loads(p.read_bytes())
+
+
+def json_bytes(obj: Dict[str, Any]) -> bytes:
+    """Stesso contenuto che write_json scrive su disco, come bytes UTF-8."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_ORJSON_WRITE_OPT)
+    return (json.dumps(obj, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
 
 
 def write_json(p: Path, obj: Dict[str, Any]) -> None:
-    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    if orjson is not None:
+        # un solo buffer bytes già UTF-8 -> una write
+        p.write_bytes(orjson.dumps(obj, option=_ORJSON_WRITE_OPT))
+        return
+    # stdlib: json.dump serializza a pezzi nel file bufferizzato (niente stringa intera in memoria)
+    with open(p, "w", encoding="utf-8", buffering=1 << 16) as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+        f.write("\n")
 
 
 def next_page_id(pages_json: Dict[str, Any]) -> str:
@@ -6,7 +6,12 @@
 - Commands (MVP):
   PING, GET_STATUS, START, STOP, SHUTDOWN, GET_DIAG,
   READ_VARS, SET_VARS, FORCE_SET, FORCE_CLEAR, GET_FORCES,
-  LOAD_PROJECT (NEW)
+  LOAD_PROJECT (NEW), SUBSCRIBE_STATUS
+- SUBSCRIBE_STATUS {"interval_ms": 1000}: after the ack, the server pushes
+  {"ok": true, "req_id": 0, "event": "STATUS", "payload": {...}} frames on the
+  same connection until it closes (no per-tick PING needed).
+- PING {"reply": "text"}: the response body is plain b"OK|<runtime_state>"
+  instead of JSON (cheap status probe for the IDE).
 
 Run (PowerShell, with venv active):
   python knetx_runtime_sim.py
@@ -41,9 +46,13 @@ def now_utc_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
+# framing: uint32 LE (lunghezza) + JSON UTF-8
+_HDR = struct.Struct("<I")
+
+
 def pack_msg(obj: Dict[str, Any]) -> bytes:
     raw = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-    return struct.pack("<I", len(raw)) + raw
+    return _HDR.pack(len(raw)) + raw
 
 
 async def read_exactly(reader: asyncio.StreamReader, n: int) -> bytes:
@@ -135,9 +144,17 @@ class LocalSimRuntime:
                 "GET_FORCES",
                 "LOAD_PROJECT",
                 "SHUTDOWN",
+                "SUBSCRIBE_STATUS",
             ],
         }
 
+    def handle_status_event(self) -> Dict[str, Any]:
+        return {
+            "runtime_state": self.state,
+            "uptime_ms": self.uptime_ms(),
+            "project_loaded": self.project_loaded,
+        }
+
     def handle_get_status(self) -> Dict[str, Any]:
         return {
             "runtime_state": self.state,
@@ -283,9 +300,22 @@ async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWrit
     conn_id = f"{peer}-{now_ms()}"
     LOG.info("Client connected: %s", peer)
 
+    # lock: le risposte e i push STATUS condividono lo stesso writer
+    send_lock = asyncio.Lock()
+    status_task: Optional[asyncio.Task] = None
+
     async def send(obj: Dict[str, Any]) -> None:
-        writer.write(pack_msg(obj))
-        await writer.drain()
+        async with send_lock:
+            writer.write(pack_msg(obj))
+            await writer.drain()
+
+    async def push_status(interval_s: float) -> None:
+        try:
+            while True:
+                await send({"ok": True, "req_id": 0, "event": "STATUS", "payload": rt.handle_status_event(), "error": ""})
+                await asyncio.sleep(interval_s)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
 
     try:
         while not shutdown_evt.is_set():
@@ -294,13 +324,13 @@ async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWrit
                 header = await read_exactly(reader, 4)
             except asyncio.IncompleteReadError:
                 break
-            (ln,) = struct.unpack("<I", header)
+            (ln,) = _HDR.unpack(header)
             if ln <= 0 or ln > 10_000_000:
                 await send({"ok": False, "req_id": -1, "payload": {}, "error": f"Invalid length: {ln}"})
                 break
             raw = await read_exactly(reader, ln)
             try:
-                msg = json.loads(raw.decode("utf-8"))
+                msg = json.loads(raw)
             except Exception as e:
                 await send({"ok": False, "req_id": -1, "payload": {}, "error": f"JSON parse error: {e}"})
                 continue
@@ -316,6 +346,13 @@ async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWrit
             try:
                 # Dispatch
                 if cmd == "PING":
+                    if payload.get("reply") == "text":
+                        # risposta minima non-JSON: il client non deve fare parse
+                        body = b"OK|" + rt.state.encode("utf-8")
+                        async with send_lock:
+                            writer.write(_HDR.pack(len(body)) + body)
+                            await writer.drain()
+                        continue
                     out = rt.handle_ping()
                 elif cmd == "GET_STATUS":
                     out = rt.handle_get_status()
@@ -359,6 +396,17 @@ async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWrit
                     out = {"forces": rt.forces.snapshot()}
                 elif cmd == "LOAD_PROJECT":
                     out = rt.handle_load_project(payload)
+                elif cmd == "SUBSCRIBE_STATUS":
+                    try:
+                        interval_ms = int(payload.get("interval_ms", 1000))
+                    except (TypeError, ValueError):
+                        raise ValueError("payload.interval_ms must be integer")
+                    interval_ms = max(100, min(60_000, interval_ms))
+                    if status_task is not None:
+                        status_task.cancel()
+                    # il task parte dopo l'ack (send_lock già preso dalla risposta sotto)
+                    status_task = asyncio.create_task(push_status(interval_ms / 1000.0))
+                    out = {"interval_ms": interval_ms}
                 elif cmd == "SHUTDOWN":
                     # LocalSim only: graceful shutdown
                     out = {"shutting_down": True}
@@ -374,6 +422,8 @@ async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWrit
                 await send({"ok": False, "req_id": req_id, "payload": {}, "error": str(e)})
 
     finally:
+        if status_task is not None:
+            status_task.cancel()
         # Fail-safe: if connection drops, clear all forces owned by this connection
         cleared = rt.forces.clear_by_connection(conn_id)
         if cleared:
@@ -42,28 +42,35 @@ def base_dir() -> Path:
 # TCP framed JSON client
 # ----------------------------
 
+# header risposta: lunghezza uint32 LE
+_HDR = struct.Struct("<I")
+
+
 def _send_cmd(host: str, port: int, cmd: str, payload: Dict[str, Any], timeout_s: float = 1.0) -> Dict[str, Any]:
     msg = {"cmd": cmd, "req_id": 1, "payload": payload}
     raw = json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-    framed = struct.pack("<I", len(raw)) + raw
+    framed = _HDR.pack(len(raw)) + raw
 
     with socket.create_connection((host, port), timeout=timeout_s) as s:
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         s.sendall(framed)
         hdr = s.recv(4)
         if len(hdr) != 4:
             raise RuntimeError("Header incompleto")
-        (ln,) = struct.unpack("<I", hdr)
+        (ln,) = _HDR.unpack(hdr)
         if ln <= 0 or ln > 10_000_000:
             raise RuntimeError(f"Lunghezza risposta non valida: {ln}")
 
-        data = b""
-        while len(data) < ln:
-            chunk = s.recv(ln - len(data))
-            if not chunk:
+        data = bytearray(ln)
+        view = memoryview(data)
+        got = 0
+        while got < ln:
+            k = s.recv_into(view[got:], ln - got)
+            if not k:
                 raise RuntimeError("Connessione chiusa")
-            data += chunk
+            got += k
 
-    return json.loads(data.decode("utf-8"))
+    return json.loads(data)
 
 
 def ping_status() -> Tuple[bool, str, int]:
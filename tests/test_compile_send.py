@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+  sys.path.insert(0, str(ROOT_DIR))
+
+
+class _FakeClient:
+  def __init__(self, host: str, port: int) -> None:
+    from ide.runtime_client import RuntimeProfile
+
+    self.profile = RuntimeProfile("job", host, port)
+    self.closed = False
+
+  def close(self) -> None:
+    self.closed = True
+
+
+class ClientPoolTest(unittest.TestCase):
+  def setUp(self) -> None:
+    try:
+      from ide import compile_send
+    except ModuleNotFoundError as exc:
+      self.skipTest(f"Missing runtime dependency: {exc}")
+    self.cs = compile_send
+    self.cs._clear_client_cache()
+
+  def test_clear_closes_pooled_clients(self) -> None:
+    a = _FakeClient("127.0.0.1", 1963)
+    b = _FakeClient("10.0.0.5", 1963)
+    for c in (a, b):
+      self.cs._client_pool(c.profile.host, c.profile.port)
+      self.cs._release_client(c)
+
+    self.cs._clear_client_cache()
+
+    self.assertTrue(a.closed)
+    self.assertTrue(b.closed)
+    self.assertEqual(self.cs._CLIENT_POOL, {})
+
+  def test_release_after_clear_closes_client(self) -> None:
+    c = _FakeClient("127.0.0.1", 1963)
+    self.cs._client_pool(c.profile.host, c.profile.port)
+    self.cs._clear_client_cache()
+
+    self.cs._release_client(c)
+
+    self.assertTrue(c.closed)
+    self.assertEqual(self.cs._CLIENT_POOL, {})
+
+
+class StIfBalanceTest(unittest.TestCase):
+  def setUp(self) -> None:
+    try:
+      from ide import compile_send
+    except ModuleNotFoundError as exc:
+      self.skipTest(f"Missing runtime dependency: {exc}")
+    self.check = compile_send._st_if_balance_check
+
+  def _diags(self, txt: str) -> list[tuple[int, str]]:
+    return [(d["line"], d["msg"]) for d in self.check({"pages/P001/S001.st": txt})]
+
+  def test_single_line_if_balances(self) -> None:
+    self.assertEqual(self._diags("IF a THEN b := 1; END_IF;\n"), [])
+
+  def test_two_ifs_on_one_line_push_two_entries(self) -> None:
+    txt = "IF a THEN IF b THEN\n  c := 1;\nEND_IF;\n"
+    self.assertEqual(self._diags(txt), [(1, "IF senza END_IF")])
+
+    txt = "IF a THEN IF b THEN\n  c := 1;\n"
+    self.assertEqual(self._diags(txt), [(1, "IF senza END_IF"), (1, "IF senza END_IF")])
+
+  def test_line_numbers_after_multiline_comment(self) -> None:
+    txt = "(* riga 1\n   IF dentro il commento\n*)\nIF x THEN\n  y := 1;\n"
+    self.assertEqual(self._diags(txt), [(4, "IF senza END_IF")])
+
+    txt = "(* a\n b *)\n// END_IF;\nEND_IF;\n"
+    self.assertEqual(self._diags(txt), [(4, "END_IF senza IF corrispondente")])
+
+  def test_unterminated_comment_runs_to_eof(self) -> None:
+    txt = "IF a THEN\n  b := 1;\n(* commento non chiuso\nEND_IF;\n"
+    self.assertEqual(self._diags(txt), [(1, "IF senza END_IF")])
+
+  def test_non_st_files_are_ignored(self) -> None:
+    self.assertEqual(self.check({"pages/P001/S001.fbd.json": "IF"}), [])
+
+
+if __name__ == "__main__":
+  unittest.main()
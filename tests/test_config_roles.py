@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+  sys.path.insert(0, str(ROOT_DIR))
+
+
+class ConfigRolesTest(unittest.TestCase):
+  def test_user_role_matches_qt(self) -> None:
+    try:
+      from PySide6 import QtCore
+    except ModuleNotFoundError as exc:
+      self.skipTest(f"Missing runtime dependency: {exc}")
+
+    from ide import config
+
+    self.assertEqual(config.ROLE_FILE, int(QtCore.Qt.UserRole))
+    self.assertEqual(config.ROLE_NODE_KIND, int(QtCore.Qt.UserRole) + 10)
+
+
+if __name__ == "__main__":
+  unittest.main()
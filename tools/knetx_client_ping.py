@@ -21,27 +21,34 @@ import struct
 from typing import Any, Dict
 
 
+# frame header: uint32 LE payload length
+_HDR = struct.Struct("<I")
+
+
 def send_cmd(host: str, port: int, cmd: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     msg = {"cmd": cmd, "req_id": 1, "payload": payload}
     raw = json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-    framed = struct.pack("<I", len(raw)) + raw
+    framed = _HDR.pack(len(raw)) + raw
 
     with socket.create_connection((host, port), timeout=2.0) as s:
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         s.sendall(framed)
 
         # Read response frame
         hdr = s.recv(4)
         if len(hdr) != 4:
             raise RuntimeError("Short header")
-        (ln,) = struct.unpack("<I", hdr)
-        data = b""
-        while len(data) < ln:
-            chunk = s.recv(ln - len(data))
-            if not chunk:
+        (ln,) = _HDR.unpack(hdr)
+        data = bytearray(ln)
+        view = memoryview(data)
+        got = 0
+        while got < ln:
+            k = s.recv_into(view[got:], ln - got)
+            if not k:
                 raise RuntimeError("Socket closed")
-            data += chunk
+            got += k
 
-    return json.loads(data.decode("utf-8"))
+    return json.loads(data)
 
 
 def main() -> int:
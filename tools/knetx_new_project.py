@@ -16,6 +16,10 @@ from typing import Any, Dict, Optional, Tuple
 from PySide6 import QtCore, QtGui, QtWidgets
 
 APP_NAME = "KnetX IDE-lite v6"
+
+# Poll stato runtime: periodo base, backoff esponenziale se OFFLINE (1.2 s -> 19.2 s)
+STATUS_POLL_MS = 1200
+STATUS_POLL_MAX_SHIFT = 4
 SCHEMA_VERSION_PROJECT = 1
 
 # Tree item data roles
@@ -31,6 +35,18 @@ CODE_FONT_SIZE_PT = 8
 LINE_NUMBER_GAP_CM = 0.5
 LINE_SPACING_PCT = 200  # 200% (doppia)
 
+# widget con objectName (albero, sheetbar, output, stato): stile aggiunto in _apply_style
+_WIDGET_QSS = (
+    "#projectTree, #outputLog{font-size:11px;}"
+    "#sheetBar::tab{font-size:10px; padding:2px 10px; margin-left:2px; background:#d9d9d9;"
+    "border:1px solid #b8b8b8; border-top-left-radius:3px; border-top-right-radius:3px;}"
+    "#sheetBar::tab:selected{background:#f2c180; border-color:#c9a36c;}"
+    "#sheetBar::tab:!selected{color:#222;}"
+    '#runtimeStatus{font-weight:600;}'
+    '#runtimeStatus[online="true"]{color:#0a0;}'
+    '#runtimeStatus[online="false"]{color:#777;}'
+)
+
 
 # ----------------------------
 # Helpers
@@ -71,7 +87,7 @@ def ensure_dir(p: Path) -> None:
 
 
 def load_json(p: Path) -> Dict[str, Any]:
-    return json.loads(p.read_text(encoding="utf-8"))
+    return json.loads(p.read_bytes())
 
 
 def write_json(p: Path, obj: Dict[str, Any]) -> None:
@@ -176,13 +192,25 @@ def apply_line_spacing(editor: QtWidgets.QPlainTextEdit) -> None:
 # ----------------------------
 # Runtime TCP client (framed JSON)
 # ----------------------------
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RuntimeProfile:
     name: str
     host: str
     port: int
 
 
+_HDR = struct.Struct("<I")
+
+
+def _frame(msg: Dict[str, Any]) -> bytes:
+    raw = json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _HDR.pack(len(raw)) + raw
+
+
+# PING è costante (req_id 1, payload vuoto): frame con header già calcolato una volta
+_PING_FRAME = _frame({"cmd": "PING", "req_id": 1, "payload": {}})
+
+
 class RuntimeClient:
     def __init__(self) -> None:
         self.profile = RuntimeProfile("LocalSim", "127.0.0.1", 1963)
@@ -191,27 +219,29 @@ class RuntimeClient:
         self.profile = p
 
     def _send_cmd(self, cmd: str, payload: Dict[str, Any], timeout_s: float = 0.7) -> Dict[str, Any]:
-        msg = {"cmd": cmd, "req_id": 1, "payload": payload}
-        raw = json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-        framed = struct.pack("<I", len(raw)) + raw
+        return self._send_frame(_frame({"cmd": cmd, "req_id": 1, "payload": payload}), timeout_s)
 
+    def _send_frame(self, framed, timeout_s: float = 0.7) -> Dict[str, Any]:
         with socket.create_connection((self.profile.host, self.profile.port), timeout=timeout_s) as s:
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             s.sendall(framed)
             hdr = s.recv(4)
             if len(hdr) != 4:
                 raise RuntimeError("Header incompleto")
-            (ln,) = struct.unpack("<I", hdr)
-            data = b""
-            while len(data) < ln:
-                chunk = s.recv(ln - len(data))
-                if not chunk:
+            (ln,) = _HDR.unpack(hdr)
+            data = bytearray(ln)
+            view = memoryview(data)
+            got = 0
+            while got < ln:
+                k = s.recv_into(view[got:], ln - got)
+                if not k:
                     raise RuntimeError("Connessione chiusa")
-                data += chunk
-        return json.loads(data.decode("utf-8"))
+                got += k
+        return json.loads(data)
 
     def ping(self) -> Tuple[bool, str]:
         try:
-            r = self._send_cmd("PING", {})
+            r = self._send_frame(_PING_FRAME)
             if not r.get("ok", False):
                 return False, "OFFLINE"
             st = (r.get("payload") or {}).get("runtime_state", "?")
@@ -220,10 +250,28 @@ class RuntimeClient:
             return False, "OFFLINE"
 
 
+class _PingSignals(QtCore.QObject):
+    done = QtCore.Signal(bool, str)
+
+
+class _PingJob(QtCore.QRunnable):
+    """ping() su QThreadPool: il timeout (0.7 s) non blocca più la GUI; esito via signal queued."""
+
+    def __init__(self, client: RuntimeClient) -> None:
+        super().__init__()
+        self.client = client
+        self.signals = _PingSignals()
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        online, st = self.client.ping()
+        self.signals.done.emit(online, st)
+
+
 # ----------------------------
 # Project model
 # ----------------------------
-@dataclass
+@dataclass(slots=True)
 class Project:
     root: Path
     name: str
@@ -547,14 +595,21 @@ class SettingsWidget(QtWidgets.QWidget):
         form.addRow("Porta", self.ed_port)
         self.setLayout(form)
 
+        # digitare "19630" = 5 valueChanged: emetto solo il valore finale
+        self._debounce = QtCore.QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(250)
+        self._debounce.timeout.connect(self.emit_changed)
+
         self.cbo.currentIndexChanged.connect(self.on_profile_sel)
-        self.ed_host.editingFinished.connect(self.emit_changed)
-        self.ed_port.valueChanged.connect(lambda _: self.emit_changed())
+        self.ed_host.editingFinished.connect(self._debounce.start)
+        self.ed_port.valueChanged.connect(lambda _: self._debounce.start())
 
     def on_profile_sel(self, idx: int) -> None:
         p = self.profiles[idx]
         self.ed_host.setText(p.host)
         self.ed_port.setValue(p.port)
+        self._debounce.stop()  # cambio profilo: emit subito, niente doppione ritardato
         self.emit_changed()
 
     def emit_changed(self) -> None:
@@ -778,6 +833,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.qs = QtCore.QSettings()
         self.project: Optional[Project] = None
         self.client = RuntimeClient()
+        # un solo ping alla volta: un runtime lento non accoda altri job a ogni tick
+        self._ping_in_flight = False
+        self._ping_job: Optional[_PingJob] = None
+        self._consec_offline = 0
 
         self._page_tabs: Dict[str, PageEditorTab] = {}
 
@@ -791,7 +850,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self._apply_style()
 
         self.timer = QtCore.QTimer(self)
-        self.timer.setInterval(1200)
+        self.timer.setInterval(STATUS_POLL_MS)
         self.timer.timeout.connect(self.refresh_status)
         self.timer.start()
 
@@ -851,7 +910,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tree = QtWidgets.QTreeWidget()
         self.tree.setHeaderHidden(True)
         self.tree.setIndentation(14)
-        self.tree.setStyleSheet("QTreeWidget{font-size:11px;}")
+        self.tree.setObjectName("projectTree")
         self.tree.itemClicked.connect(self.on_tree_clicked)
 
         self.tree.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
@@ -890,12 +949,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.sheetbar.setUsesScrollButtons(True)
         self.sheetbar.currentChanged.connect(self.on_sheetbar_changed)
 
-        self.sheetbar.setStyleSheet(
-            "QTabBar::tab{font-size:10px; padding:2px 10px; margin-left:2px;"
-            "background:#d9d9d9; border:1px solid #b8b8b8; border-top-left-radius:3px; border-top-right-radius:3px;}"
-            "QTabBar::tab:selected{background:#f2c180; border-color:#c9a36c;}"
-            "QTabBar::tab:!selected{color:#222;}"
-        )
+        self.sheetbar.setObjectName("sheetBar")
 
         hb.addWidget(self.sheetbar, 0, QtCore.Qt.AlignRight)
 
@@ -921,12 +975,14 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.output = QtWidgets.QPlainTextEdit()
         self.output.setReadOnly(True)
-        self.output.setStyleSheet("font-size:11px;")
+        self.output.setObjectName("outputLog")
         lay_out = QtWidgets.QVBoxLayout(self.tab_output)
         lay_out.setContentsMargins(6, 6, 6, 6)
         lay_out.addWidget(self.output)
 
         self.lbl_status = QtWidgets.QLabel("OFFLINE")
+        self.lbl_status.setObjectName("runtimeStatus")
+        self.lbl_status.setProperty("online", False)
         sb = self.statusBar()
         sb.addWidget(self.lbl_status)
 
@@ -966,6 +1022,7 @@ class MainWindow(QtWidgets.QMainWindow):
             "QToolButton{padding:2px 6px;}"
             "QTabBar::tab{padding:4px 8px; margin:1px;}"
             "QSplitter::handle{background:#ddd;}"
+            + _WIDGET_QSS
         )
 
     # ----------------
@@ -983,14 +1040,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tree.addTopLevelItem(root)
         root.setExpanded(True)
 
-    def _add_sheet_item(
+    def _make_sheet_item(
         self,
-        parent: QtWidgets.QTreeWidgetItem,
         page_id: str,
         page_name: str,
         sh: Dict[str, Any],
         sheet_index_0: int,
-    ) -> None:
+    ) -> QtWidgets.QTreeWidgetItem:
         sheet_id = str(sh.get("id", ""))
         sheet_name = str(sh.get("name", sheet_id or "Foglio"))
         label = f"{sheet_id} - {sheet_name}" if sheet_id else sheet_name
@@ -1004,53 +1060,62 @@ class MainWindow(QtWidgets.QMainWindow):
             child.setData(0, ROLE_SHEET_INDEX0, sheet_index_0)
             child.setData(0, ROLE_NODE_KIND, "SHEET")
 
-        parent.addChild(child)
+        return child
 
     def populate_tree_from_project(self) -> None:
         if not self.project:
             self.populate_tree_empty()
             return
 
-        self.tree.clear()
-        root_proj = QtWidgets.QTreeWidgetItem([self.project.name])
-        self.tree.addTopLevelItem(root_proj)
-
-        root_vars = QtWidgets.QTreeWidgetItem(["Variabili"])
-        root_pages = QtWidgets.QTreeWidgetItem(["Pagine"])
-        root_bus = QtWidgets.QTreeWidgetItem(["Bus"])
-        root_proj.addChild(root_vars)
-        root_proj.addChild(root_pages)
-        root_proj.addChild(root_bus)
-
-        root_pages.setData(0, ROLE_NODE_KIND, "PAGES_ROOT")
-
-        init = self.project.pages_json.get("init")
-        if init:
-            init_id = str(init.get("id", "INIT"))
-            init_name = str(init.get("name", "Init"))
-            it = QtWidgets.QTreeWidgetItem([f"Init ({init_name})"])
-            it.setData(0, ROLE_NODE_KIND, "PAGE")
-            it.setData(0, ROLE_PAGE_ID, init_id)
-            it.setData(0, ROLE_PAGE_NAME, init_name)
-            root_pages.addChild(it)
-
-            for idx, sh in enumerate(init.get("sheets", [])):
-                self._add_sheet_item(it, init_id, init_name, sh, idx)
-
-        for p in self.project.pages_json.get("pages", []):
-            page_id = str(p.get("id", "P???"))
-            page_name = str(p.get("name", page_id))
-            pt = QtWidgets.QTreeWidgetItem([f"{page_id} ({page_name})"])
-            pt.setData(0, ROLE_NODE_KIND, "PAGE")
-            pt.setData(0, ROLE_PAGE_ID, page_id)
-            pt.setData(0, ROLE_PAGE_NAME, page_name)
-            root_pages.addChild(pt)
-
-            for idx, sh in enumerate(p.get("sheets", [])):
-                self._add_sheet_item(pt, page_id, page_name, sh, idx)
-
-        root_proj.setExpanded(True)
-        root_pages.setExpanded(True)
+        self.tree.setUpdatesEnabled(False)
+        try:
+            self.tree.clear()
+            # sottoalbero costruito staccato dalla view, figli aggiunti con un addChildren per parent,
+            # un solo addTopLevelItem alla fine
+            root_proj = QtWidgets.QTreeWidgetItem([self.project.name])
+
+            root_vars = QtWidgets.QTreeWidgetItem(["Variabili"])
+            root_pages = QtWidgets.QTreeWidgetItem(["Pagine"])
+            root_bus = QtWidgets.QTreeWidgetItem(["Bus"])
+            root_proj.addChildren([root_vars, root_pages, root_bus])
+
+            root_pages.setData(0, ROLE_NODE_KIND, "PAGES_ROOT")
+
+            page_items: list[QtWidgets.QTreeWidgetItem] = []
+
+            init = self.project.pages_json.get("init")
+            if init:
+                init_id = str(init.get("id", "INIT"))
+                init_name = str(init.get("name", "Init"))
+                it = QtWidgets.QTreeWidgetItem([f"Init ({init_name})"])
+                it.setData(0, ROLE_NODE_KIND, "PAGE")
+                it.setData(0, ROLE_PAGE_ID, init_id)
+                it.setData(0, ROLE_PAGE_NAME, init_name)
+                it.addChildren(
+                    [self._make_sheet_item(init_id, init_name, sh, idx) for idx, sh in enumerate(init.get("sheets", []))]
+                )
+                page_items.append(it)
+
+            for p in self.project.pages_json.get("pages", []):
+                page_id = str(p.get("id", "P???"))
+                page_name = str(p.get("name", page_id))
+                pt = QtWidgets.QTreeWidgetItem([f"{page_id} ({page_name})"])
+                pt.setData(0, ROLE_NODE_KIND, "PAGE")
+                pt.setData(0, ROLE_PAGE_ID, page_id)
+                pt.setData(0, ROLE_PAGE_NAME, page_name)
+                pt.addChildren(
+                    [self._make_sheet_item(page_id, page_name, sh, idx) for idx, sh in enumerate(p.get("sheets", []))]
+                )
+                page_items.append(pt)
+
+            root_pages.addChildren(page_items)
+            self.tree.addTopLevelItem(root_proj)
+
+            # setExpanded ha effetto solo su item già nella view
+            root_proj.setExpanded(True)
+            root_pages.setExpanded(True)
+        finally:
+            self.tree.setUpdatesEnabled(True)
 
     def _sheetbar_clear_tabs(self) -> None:
         while self.sheetbar.count() > 0:
@@ -1563,16 +1628,47 @@ class MainWindow(QtWidgets.QMainWindow):
     # ----------------
     def on_profile_changed(self, p: RuntimeProfile) -> None:
         self.client.set_profile(p)
+        # nuovo profilo: niente backoff ereditato dal precedente
+        self._consec_offline = 0
+        self.timer.setInterval(STATUS_POLL_MS)
         self.refresh_status()
 
+    def changeEvent(self, e: QtCore.QEvent) -> None:
+        super().changeEvent(e)
+        if e.type() == QtCore.QEvent.WindowStateChange:
+            # finestra minimizzata: nessuno guarda lo stato, niente poll
+            if self.isMinimized():
+                self.timer.stop()
+            elif not self.timer.isActive():
+                self.timer.start()
+                self.refresh_status()
+
     def refresh_status(self) -> None:
-        online, st = self.client.ping()
+        if self._ping_in_flight:
+            return
+        self._ping_in_flight = True
+        job = _PingJob(self.client)
+        job.signals.done.connect(self._apply_status)
+        self._ping_job = job
+        QtCore.QThreadPool.globalInstance().start(job)
+
+    def _apply_status(self, online: bool, st: str) -> None:
+        self._ping_in_flight = False
+        self._ping_job = None
         if online:
+            self._consec_offline = 0
             self.lbl_status.setText(f"ONLINE — {st}")
-            self.lbl_status.setStyleSheet("color:#0a0; font-weight:600;")
         else:
+            self._consec_offline += 1
             self.lbl_status.setText("OFFLINE")
-            self.lbl_status.setStyleSheet("color:#777; font-weight:600;")
+        # colore da _WIDGET_QSS (proprietà "online"): re-polish solo se lo stato cambia
+        if self.lbl_status.property("online") != online:
+            self.lbl_status.setProperty("online", online)
+            self.lbl_status.style().unpolish(self.lbl_status)
+            self.lbl_status.style().polish(self.lbl_status)
+        interval = STATUS_POLL_MS << min(self._consec_offline, STATUS_POLL_MAX_SHIFT)
+        if self.timer.interval() != interval:
+            self.timer.setInterval(interval)
 
     def stub_compile(self) -> None:
         QtWidgets.QMessageBox.information(self, "Compila", "MVP: compilazione non ancora implementata.")
@@ -1594,7 +1690,8 @@ def acquire_ide_lock() -> bool:
     p.mkdir(parents=True, exist_ok=True)
     lf = QtCore.QLockFile(str(p / "knetx_ide.lock"))
     lf.setStaleLockTime(5_000)
-    if lf.tryLock(100):
+    # niente attesa: un lock stale (processo morto) viene comunque rimosso da tryLock
+    if lf.tryLock(0):
         _lock_file = lf
         return True
     return False